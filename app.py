@@ -3,10 +3,14 @@
 import streamlit as st
 import pandas as pd
 from services.search_service import SearchService
-from services.query_generator import QueryGenerator
+from services.prefetch import Prefetcher
+from services.model_registry import model_registry
 from config import Config
+from utils.metrics import start_metrics_server
+from utils.export import EXPORT_FORMATS
 from logger_config import get_logger
 import traceback
+import uuid
 
 logger = get_logger("StreamlitApp")
 
@@ -79,17 +83,128 @@ div[data-baseweb="input"] input {
 def init_services():
     try:
         Config.validate()
+        search_service = SearchService()
+        try:
+            search_service.db.warm_schema_registry()
+        except Exception as e:
+            # Best effort: a DB blip at boot must not be cached as a failed init;
+            # queries fill the registry lazily instead
+            logger.warning("Could not warm schema registry: %s", e)
+        if Config.WARM_UP_MODELS:
+            model_registry.warm_up()
+        if Config.METRICS_PORT:
+            start_metrics_server(Config.METRICS_PORT)
+        prefetcher = Prefetcher(search_service) if Config.PREFETCH_ENABLED else None
         logger.info("Services initialized successfully")
-        return SearchService(), QueryGenerator()
+        return search_service, search_service.query_generator, prefetcher
     except Exception as e:
         logger.exception("Failed to initialize services")
         st.error(f"Failed to initialize services: {str(e)}")
-        return None, None
+        return None, None, None
 
 if 'search_history' not in st.session_state:
     st.session_state.search_history = []
 if 'current_results' not in st.session_state:
     st.session_state.current_results = None
+if 'prefetch_round' not in st.session_state:
+    st.session_state.prefetch_round = None
+if 'pending_query' not in st.session_state:
+    st.session_state.pending_query = None
+if 'result_id' not in st.session_state:
+    st.session_state.result_id = None
+if 'frame' not in st.session_state:
+    st.session_state.frame = None
+if 'export' not in st.session_state:
+    st.session_state.export = None
+
+CURRENCY_KEYS = ["salary", "price", "total"]
+
+def build_frame(rows):
+    """DataFrame for a result, with currency and similarity columns made numeric"""
+    df = pd.DataFrame(rows)
+    for col in df.columns:
+        if any(k in col.lower() for k in CURRENCY_KEYS) or "similarity" in col.lower():
+            # Decimal/str values from the driver become floats so formatting stays display-only
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+def display_formats(df):
+    """Per-column display formats for the results table; the underlying values stay numeric"""
+    formats = {}
+    for col in df.columns:
+        if any(k in col.lower() for k in CURRENCY_KEYS):
+            formats[col] = "${:,.2f}"
+        elif "similarity" in col.lower():
+            formats[col] = "{:.1%}"
+    return formats
+
+def render_page(df, result_id):
+    """Render one page of the results table"""
+    page_size = Config.RESULTS_PAGE_SIZE
+    pages = max(1, -(-len(df) // page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1, key=f"page_{result_id}"
+        )
+    view = df.iloc[(page - 1) * page_size:page * page_size]
+    # Styler formats only what is shown, so columns still sort as numbers
+    styled = view.style.format(display_formats(view), na_rep="")
+    st.dataframe(styled, use_container_width=True, hide_index=True)
+    if pages > 1:
+        st.caption(f"Rows {(page - 1) * page_size + 1}-{min(page * page_size, len(df))} of {len(df)}")
+
+def render_export(df, result_id):
+    """Build the export file only when asked for, then offer it for download"""
+    cols = st.columns([2, 1])
+    fmt = cols[0].radio(
+        "Export format", list(EXPORT_FORMATS), horizontal=True, key=f"export_format_{result_id}",
+        label_visibility="collapsed"
+    )
+    if cols[1].button("📦 Prepare download", key=f"export_{result_id}"):
+        export, _, _ = EXPORT_FORMATS[fmt]
+        with st.spinner(f"Building {fmt} export..."):
+            st.session_state.export = (result_id, fmt, export(df, Config.EXPORT_CHUNK_ROWS))
+        logger.info("Export built | format=%s | rows=%d", fmt, len(df))
+
+    prepared = st.session_state.export
+    if prepared and prepared[0] == result_id and prepared[1] == fmt:
+        _, file_name, mime = EXPORT_FORMATS[fmt]
+        st.download_button(f"📥 Download Results ({fmt})", prepared[2], file_name, mime)
+
+def ask_suggestion(suggestion):
+    st.session_state.pending_query = suggestion
+
+def run_streaming_search(search_service, user_query):
+    """Show the SQL as it is generated and the rows as soon as they are back"""
+    status, sql_box, rows_box = st.empty(), st.empty(), st.empty()
+    status.caption("🔄 Processing your query...")
+    result = None
+    for event in search_service.search_stream(user_query):
+        if event['event'] == 'sql':
+            sql_box.code(event['sql_query'], language="sql")
+            if event['complete']:
+                status.caption("⚙️ Running query...")
+            else:
+                status.caption("✍️ Generating SQL...")
+        elif event['event'] == 'results':
+            rows_box.dataframe(
+                pd.DataFrame(event['results'][:Config.RESULTS_PAGE_SIZE]), use_container_width=True, hide_index=True
+            )
+            status.caption("📝 Explaining results...")
+        elif event['event'] == 'done':
+            result = event['result']
+    # The full result is rendered below in its usual layout
+    status.empty()
+    sql_box.empty()
+    rows_box.empty()
+    return result
+
+def start_prefetch(prefetcher, user_query):
+    """Cancel this session's previous prefetch and start one for the new question"""
+    if st.session_state.prefetch_round is not None:
+        st.session_state.prefetch_round.cancel()
+    st.session_state.prefetch_round = prefetcher.start(user_query) if prefetcher else None
 
 def main():
 
@@ -101,7 +216,7 @@ def main():
         unsafe_allow_html=True
     )
 
-    search_service, query_generator = init_services()
+    search_service, query_generator, prefetcher = init_services()
     if not search_service or not query_generator:
         st.error("❌ Services not initialized properly")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -115,25 +230,39 @@ def main():
 
     search_button = st.button("🔍 Search")
 
+    if st.session_state.pending_query:
+        user_query, search_button = st.session_state.pending_query, True
+        st.session_state.pending_query = None
+
     if search_button and user_query:
         logger.info("User query: %s", user_query)
-        with st.spinner("🔄 Processing your query..."):
-            try:
-                if user_query not in st.session_state.search_history:
-                    st.session_state.search_history.append(user_query)
-
-                result = search_service.search(user_query)
-                st.session_state.current_results = result
-                logger.info("Query executed successfully")
-            except Exception as e:
-                st.error(f"❌ Error: {str(e)}")
-                logger.exception("Error while processing query")
-                if Config.DEBUG:
-                    st.code(traceback.format_exc())
+        try:
+            if user_query not in st.session_state.search_history:
+                st.session_state.search_history.append(user_query)
+
+            if Config.STREAM_SQL_GENERATION:
+                result = run_streaming_search(search_service, user_query)
+            else:
+                with st.spinner("🔄 Processing your query..."):
+                    result = search_service.search(user_query)
+            st.session_state.current_results = result
+            # Unique across sessions; widget keys and the prepared export refer to it
+            st.session_state.result_id = uuid.uuid4().hex
+            st.session_state.export = None
+            start_prefetch(prefetcher, user_query)
+            logger.info("Query executed successfully")
+        except Exception as e:
+            st.error(f"❌ Error: {str(e)}")
+            logger.exception("Error while processing query")
+            if Config.DEBUG:
+                st.code(traceback.format_exc())
 
     if st.session_state.current_results:
         result = st.session_state.current_results
 
+        if result.get("prefetched"):
+            st.caption("⚡ Answered instantly from a prefetched follow-up")
+
         if result.get("explanation"):
             st.info(f"📝 {result['explanation']}")
 
@@ -141,35 +270,39 @@ def main():
             with st.expander("🔧 Generated SQL Query"):
                 st.code(result["sql_query"], language="sql")
 
+        if result.get("timings"):
+            with st.expander("⏱️ Stage Timings (ms)"):
+                st.json(result["timings"])
+
         if result.get("success"):
-            df = pd.DataFrame(result["results"])
+            result_id = st.session_state.result_id
+            # Built once per result and kept in this session, so reruns (paging,
+            # export) reuse it and no other session can ever be handed it
+            if st.session_state.frame is None or st.session_state.frame[0] != result_id:
+                st.session_state.frame = (result_id, build_frame(result["results"]))
+            df = st.session_state.frame[1]
             if not df.empty:
                 st.success(f"✅ Found {len(df)} results")
-
-                for col in df.columns:
-                    if any(k in col.lower() for k in ["salary", "price", "total"]):
-                        df[col] = df[col].apply(
-                            lambda x: f"${float(x):,.2f}" if pd.notnull(x) else ""
-                        )
-                    elif "similarity" in col.lower():
-                        df[col] = df[col].apply(
-                            lambda x: f"{float(x)*100:.1f}%" if pd.notnull(x) else ""
-                        )
-
-                st.dataframe(df, use_container_width=True, hide_index=True)
-
-                csv = df.to_csv(index=False)
-                st.download_button(
-                    "📥 Download Results (CSV)",
-                    csv,
-                    "search_results.csv",
-                    "text/csv",
-                )
+                render_page(df, result_id)
+                render_export(df, result_id)
             else:
                 st.warning("No results found.")
         else:
             st.error(result.get("error", "Unknown error"))
 
+        prefetch_round = st.session_state.prefetch_round
+        if prefetch_round is not None:
+            # Never block the script on the LLM; suggestions not ready yet appear on a later rerun
+            if not prefetch_round.suggestions_ready:
+                st.caption("💡 Finding related questions...")
+                st.button("Show related questions", key="refresh_suggestions")
+            elif prefetch_round.suggestions:
+                st.markdown("**💡 Related questions**")
+                for i, suggestion in enumerate(prefetch_round.wait_for_suggestions(timeout=0)):
+                    st.button(suggestion, key=f"suggestion_{i}", on_click=ask_suggestion, args=(suggestion,))
+            with st.expander("⚡ Prefetch"):
+                st.json({**prefetcher.stats(), "current_round": prefetch_round.outcomes})
+
     st.markdown("</div>", unsafe_allow_html=True)
 
 if __name__ == "__main__":
@@ -0,0 +1 @@
+"""Performance benchmarks for SchemaSight (run from the repository root with ``python -m``)"""
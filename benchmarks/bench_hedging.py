@@ -0,0 +1,91 @@
+"""
+Simulate hedged LLM requests against local stub backends.
+
+Both backends draw latencies from a lognormal distribution; the primary
+occasionally has a much slower tail. Reports p50/p95/p99 with and without
+hedging, plus how often the hedge fired and the backup won.
+
+Usage:
+    python -m benchmarks.bench_hedging --requests 500 --concurrency 8
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from services.hedging import HedgedBackend
+from services.llm_backends import StubBackend
+
+CANNED_SQL = "select e.name from employees e limit 100"
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def slow_tail_latency(median, sigma, tail_probability, tail_multiplier, seed):
+    base = StubBackend.lognormal_latency(median, sigma, seed=seed)
+    rng = random.Random(seed + 1)
+
+    def sample():
+        latency = base()
+        if rng.random() < tail_probability:
+            latency *= tail_multiplier
+        return latency
+    return sample
+
+
+def run(backend, requests, concurrency):
+    messages = [{"role": "user", "content": "show all employees"}]
+
+    def one(_):
+        start = time.perf_counter()
+        backend.complete(messages, timeout=30)
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(requests)))
+
+
+def report(label, latencies):
+    print(
+        f"{label:<10} p50={percentile(latencies, 0.50) * 1000:8.1f}ms "
+        f"p95={percentile(latencies, 0.95) * 1000:8.1f}ms "
+        f"p99={percentile(latencies, 0.99) * 1000:8.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--median-ms", type=float, default=80)
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--tail-multiplier", type=float, default=10)
+    parser.add_argument("--percentile", type=float, default=0.95)
+    args = parser.parse_args()
+
+    def make_primary(seed):
+        return StubBackend(
+            CANNED_SQL,
+            slow_tail_latency(args.median_ms / 1000, 0.3, args.tail_probability, args.tail_multiplier, seed),
+            name="primary",
+        )
+
+    report("unhedged", run(make_primary(1), args.requests, args.concurrency))
+
+    backup = StubBackend(
+        CANNED_SQL, StubBackend.lognormal_latency(args.median_ms * 1.5 / 1000, 0.3, seed=3), name="backup"
+    )
+    hedged = HedgedBackend(make_primary(1), backup, hedge_percentile=args.percentile, min_samples=20)
+    report("hedged", run(hedged, args.requests, args.concurrency))
+    print(
+        f"hedges fired: {hedged.stats['hedges']}/{hedged.stats['requests']} | "
+        f"backup wins: {hedged.stats['backup_wins']} | "
+        f"extra load: {backup.calls / max(1, hedged.stats['requests']):.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
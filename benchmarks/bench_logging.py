@@ -0,0 +1,122 @@
+"""
+Per-query logging overhead, before and after the asynchronous logging mode.
+
+Replays the log calls a typical SQL search makes (routing, validation,
+connection checkout, row counts, ...) and measures the time spent in the
+calling thread per query for each logging mode. Output goes to a temporary
+file (or --output), which like a container log pipe costs a write per flush.
+
+Usage:
+    python -m benchmarks.bench_logging --queries 20000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import logger_config
+from logger_config import correlation_scope, get_logger
+
+# (logger, level, message, args) emitted per search, mirroring the hot path
+HOT_PATH_CALLS = [
+    ("search_service", logging.INFO, "Received search query: %s", ("Show all employees in Engineering",)),
+    ("search_service", logging.INFO, "Performing SQL-based search", ()),
+    ("search_service", logging.INFO, "Executing SQL search for query: %s", ("Show all employees in Engineering",)),
+    ("query_generator", logging.INFO, "Generating SQL for user query: %s", ("Show all employees in Engineering",)),
+    ("query_generator", logging.INFO, "SQL generated successfully by %s", ("groq:llama-3.3-70b-versatile",)),
+    ("sql_validator", logging.INFO, "Validating SQL query: %s", ("select e.name from employees e limit 100",)),
+    ("sql_validator", logging.INFO, "SQL query validation passed", ()),
+    ("database", logging.INFO, "Query executed successfully | rows=%d", (42,)),
+    ("search_service", logging.INFO, "SQL query executed successfully | rows=%d", (42,)),
+    ("query_generator", logging.INFO, "Generating explanation for SQL query", ()),
+]
+
+MODES = [
+    ("sync text", {"LOG_FORMAT": "text", "LOG_ASYNC": False, "LOG_SAMPLE_RATES": ""}),
+    ("async json", {"LOG_FORMAT": "json", "LOG_ASYNC": True, "LOG_SAMPLE_RATES": ""}),
+    ("async json + sampling", {
+        "LOG_FORMAT": "json", "LOG_ASYNC": True,
+        "LOG_SAMPLE_RATES": "search_service=0.1,sql_validator=0.1,database=0.1,query_generator=0.1",
+    }),
+]
+
+
+class SlowSink:
+    """File wrapper that stalls on every write, like a log pipe under backpressure"""
+
+    def __init__(self, stream, latency_seconds):
+        self.stream = stream
+        self.latency_seconds = latency_seconds
+
+    def write(self, data):
+        time.sleep(self.latency_seconds)
+        return self.stream.write(data)
+
+    def flush(self):
+        self.stream.flush()
+
+    def isatty(self):
+        return False
+
+    def close(self):
+        self.stream.close()
+
+
+def run_mode(label, settings, queries):
+    for key, value in settings.items():
+        setattr(logger_config, key, value)
+    suffix = label.replace(" ", "_").replace("+", "")
+    loggers = {name: get_logger(f"{name}.{suffix}") for name, _, _, _ in HOT_PATH_CALLS}
+    # Sampling rates are configured per base logger name
+    if settings["LOG_SAMPLE_RATES"]:
+        for name, log in loggers.items():
+            rate = logger_config._sample_rates().get(name)
+            if rate is not None:
+                log.handlers[0].filters.insert(0, logger_config.SamplingFilter(rate))
+    calls = [(loggers[name], level, msg, args) for name, level, msg, args in HOT_PATH_CALLS]
+
+    start = time.perf_counter()
+    for _ in range(queries):
+        with correlation_scope():
+            for log, level, msg, args in calls:
+                log.log(level, msg, *args)
+    caller_seconds = time.perf_counter() - start
+
+    drain_start = time.perf_counter()
+    logger_config.stop_logging()
+    drain_seconds = time.perf_counter() - drain_start
+    return caller_seconds * 1e6 / queries, drain_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--output", help="file to write log output to (default: a temporary file)")
+    parser.add_argument("--sink-latency-us", type=float, default=0,
+                        help="simulated stall per write on the log sink")
+    args = parser.parse_args()
+
+    output = args.output or tempfile.mkstemp(prefix="schemasight-bench-log-")[1]
+    real_stdout = sys.stdout
+    sys.stdout = open(output, "w")
+    if args.sink_latency_us:
+        sys.stdout = SlowSink(sys.stdout, args.sink_latency_us / 1e6)
+    results = []
+    try:
+        for label, settings in MODES:
+            results.append((label,) + run_mode(label, settings, args.queries))
+    finally:
+        sys.stdout.close()
+        sys.stdout = real_stdout
+        if not args.output:
+            os.remove(output)
+
+    print(f"{'mode':<24}{'us/query (caller)':>20}{'drain after run':>18}")
+    for label, per_query_us, drain in results:
+        print(f"{label:<24}{per_query_us:>20.1f}{drain:>17.2f}s")
+
+
+if __name__ == "__main__":
+    main()
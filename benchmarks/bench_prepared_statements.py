@@ -0,0 +1,107 @@
+"""
+Benchmark planning time saved by the prepared statement registry.
+
+Usage:
+    python -m benchmarks.bench_prepared_statements --iterations 200
+"""
+
+import argparse
+import json
+import random
+import time
+from database.connection import DatabaseConnection
+from database.prepared import prepared_statements
+import services.embedding_service  # noqa: F401  (registers the search statements)
+from logger_config import get_logger
+
+logger = get_logger("bench_prepared_statements")
+
+EMBEDDING_DIM = 384
+
+
+def _random_embedding():
+    vector = [random.gauss(0, 1) for _ in range(EMBEDDING_DIM)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return str([v / norm for v in vector])
+
+
+def _adhoc_sql(statement):
+    """Rewrite $n placeholders into psycopg2 %s placeholders with explicit casts"""
+    sql = statement.sql
+    ordered = []
+    for index, param_type in enumerate(statement.param_types, start=1):
+        sql = sql.replace(f"${index}", f"%(p{index})s::{param_type}")
+        ordered.append(f"p{index}")
+    return sql, ordered
+
+
+def _planning_time(cursor, sql, params):
+    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Planning Time"]
+
+
+def bench_statement(db, name, params, iterations):
+    statement = prepared_statements.get(name)
+    adhoc_sql, keys = _adhoc_sql(statement)
+    adhoc_params = dict(zip(keys, params))
+
+    with db.get_cursor(dict_cursor=False) as cursor:
+        adhoc_planning = [_planning_time(cursor, adhoc_sql, adhoc_params) for _ in range(iterations)]
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            cursor.execute(adhoc_sql, adhoc_params)
+            cursor.fetchall()
+        adhoc_elapsed = time.perf_counter() - start
+
+        prepared_statements.ensure_prepared(cursor, name)
+        prepared_planning = [
+            _planning_time(cursor, statement.execute_sql, params) for _ in range(iterations)
+        ]
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            prepared_statements.execute(cursor, name, params)
+            cursor.fetchall()
+        prepared_elapsed = time.perf_counter() - start
+
+    return {
+        "statement": name,
+        "adhoc_planning_ms": sum(adhoc_planning) / iterations,
+        "prepared_planning_ms": sum(prepared_planning) / iterations,
+        "adhoc_wall_ms": adhoc_elapsed * 1000 / iterations,
+        "prepared_wall_ms": prepared_elapsed * 1000 / iterations,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    db = DatabaseConnection()
+    cases = [
+        ("search_similar_products", (_random_embedding(), 10)),
+        ("search_similar_employees", (_random_embedding(), 10)),
+        ("table_exists", ("employees",)),
+    ]
+
+    print(f"{'statement':<28}{'plan adhoc':>12}{'plan prep':>12}{'saved/query':>13}{'wall adhoc':>12}{'wall prep':>12}")
+    for name, params in cases:
+        row = bench_statement(db, name, params, args.iterations)
+        saved = row["adhoc_planning_ms"] - row["prepared_planning_ms"]
+        print(
+            f"{row['statement']:<28}"
+            f"{row['adhoc_planning_ms']:>10.3f}ms"
+            f"{row['prepared_planning_ms']:>10.3f}ms"
+            f"{saved:>11.3f}ms"
+            f"{row['adhoc_wall_ms']:>10.3f}ms"
+            f"{row['prepared_wall_ms']:>10.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Startup time and memory of the service layer.
+
+Each measurement runs in a fresh interpreter and reports:
+  import     - importing the service modules
+  construct  - building the services the way app.init_services does
+  first_use  - loading/using the embedding model for the first time
+plus peak RSS after construction and after first use.
+
+Pass --ref to measure another revision (e.g. the commit before lazy loading)
+side by side; it is checked out into a temporary git worktree.
+
+Usage:
+    python -m benchmarks.bench_startup --runs 3
+    python -m benchmarks.bench_startup --ref HEAD~1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PROBE = r"""
+import json, resource, time
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+t0 = time.perf_counter()
+from services.search_service import SearchService
+from services.query_generator import QueryGenerator
+t1 = time.perf_counter()
+search_service, query_generator = SearchService(), QueryGenerator()
+t2 = time.perf_counter()
+rss_constructed = rss_mb()
+try:
+    from services.model_registry import model_registry
+    model_registry.warm_up(llm=False)
+except ImportError:
+    search_service.embedding_service.generate_embedding("warm up")
+t3 = time.perf_counter()
+print("RESULT " + json.dumps({
+    "import": t1 - t0, "construct": t2 - t1, "first_use": t3 - t2,
+    "rss_constructed_mb": rss_constructed, "rss_first_use_mb": rss_mb(),
+}))
+"""
+
+
+def probe(cwd):
+    env = dict(os.environ, GROQ_API_KEY=os.environ.get("GROQ_API_KEY") or "unused", LOG_SAMPLE_RATES="")
+    completed = subprocess.run([sys.executable, "-c", PROBE], cwd=cwd, env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup probe failed in {cwd}:\n{completed.stderr[-2000:]}")
+    line = next(line for line in completed.stdout.splitlines() if line.startswith("RESULT "))
+    return json.loads(line[len("RESULT "):])
+
+
+def measure(cwd, runs):
+    samples = [probe(cwd) for _ in range(runs)]
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--ref", help="git revision to compare against")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    columns = {"current": measure(root, args.runs)}
+
+    if args.ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            worktree = os.path.join(tmp, "ref")
+            subprocess.run(["git", "worktree", "add", "--detach", worktree, args.ref],
+                           cwd=root, check=True, capture_output=True)
+            try:
+                columns[args.ref] = measure(worktree, args.runs)
+            finally:
+                subprocess.run(["git", "worktree", "remove", "--force", worktree], cwd=root, capture_output=True)
+
+    names = list(columns)
+    print(f"{'metric':<22}" + "".join(f"{name:>14}" for name in names))
+    for key in columns["current"]:
+        unit = "MB" if key.endswith("_mb") else "s"
+        print(f"{key:<22}" + "".join(f"{columns[name][key]:>12.2f}{unit:>2}" for name in names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Replay corpus and canned LLM responses for the end-to-end benchmark"""
+
+from services.llm_backends import StubBackend
+
+# (question, canned SQL). Semantic questions have no SQL: they are routed to vector search.
+QUERY_CORPUS = [
+    ("Show all employees in the Engineering department",
+     "select e.name, e.email, e.salary from employees e join departments d on e.department_id = d.id "
+     "where d.name = 'Engineering' limit 100"),
+    ("What is the average salary per department",
+     "select d.name, avg(e.salary) as avg_salary from employees e join departments d "
+     "on e.department_id = d.id group by d.name order by avg_salary desc limit 100"),
+    ("Top 10 most expensive products",
+     "select p.name, p.price from products p order by p.price desc limit 10"),
+    ("Total order value by month",
+     "select date_trunc('month', o.order_date) as month, sum(o.order_total) as total "
+     "from orders o group by month order by month limit 100"),
+    ("Which employees handled the most orders",
+     "select e.name, count(o.id) as orders_handled from employees e join orders o "
+     "on o.employee_id = e.id group by e.name order by orders_handled desc limit 10"),
+    ("Orders above 1000 in the last 90 days",
+     "select o.customer_name, o.order_total, o.order_date from orders o "
+     "where o.order_total > 1000 and o.order_date > current_date - 90 limit 100"),
+    ("Employees earning more than 90000",
+     "select e.name, e.salary from employees e where e.salary > 90000 order by e.salary desc limit 100"),
+    ("Find products similar to wireless headphones", None),
+    ("Find products like an ergonomic keyboard", None),
+    ("Search for employee named Priya", None),
+]
+
+HYBRID_CORPUS = [
+    ("Products related to laptops under 500",
+     "select p.id, p.name, p.price from products p where p.name ilike '%laptop%' and p.price < 500 limit 100"),
+    ("Employees similar to John in Sales",
+     "select e.id, e.name, e.salary from employees e join departments d on e.department_id = d.id "
+     "where d.name = 'Sales' and e.name ilike '%john%' limit 100"),
+]
+
+
+class CannedResponder:
+    """Answers SQL-generation, explanation and suggestion prompts from the corpus"""
+
+    def __init__(self, corpus=QUERY_CORPUS + HYBRID_CORPUS):
+        self.sql_by_question = {question: sql for question, sql in corpus if sql}
+        self.fallback_sql = "select e.name from employees e limit 100"
+
+    def __call__(self, messages):
+        system = messages[0]["content"] if messages[0]["role"] == "system" else ""
+        user = messages[-1]["content"]
+        if "Explain SQL" in system:
+            return "Returns the requested rows from the benchmark dataset."
+        if "Suggest 3 related" in user:
+            return '{"queries": ["Top 10 most expensive products", "Total order value by month", ' \
+                   '"Employees earning more than 90000"]}'
+        return self.sql_by_question.get(user.strip(), self.fallback_sql)
+
+
+def build_stub_backend(median_latency_ms=300, sigma=0.4, seed=7):
+    """StubBackend that answers like the LLM with lognormal latency"""
+    return StubBackend(
+        CannedResponder(),
+        StubBackend.lognormal_latency(median_latency_ms / 1000, sigma, seed=seed),
+        name="stub-llm",
+        seed=seed,
+    )
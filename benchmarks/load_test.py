@@ -0,0 +1,174 @@
+"""
+Load test for the headless HTTP server (server.py).
+
+Closed loop by default: ``--concurrency`` clients each send a request as soon
+as the previous one returns. With ``--rate`` requests are instead fired at a
+fixed rate regardless of how fast the server answers (open loop), which is
+what exposes queueing and 429 backpressure.
+
+``--stub-server`` starts a local server whose SearchService just sleeps for
+``--service-latency-ms``, to measure the serving layer without a database or
+LLM.
+
+Usage:
+    python server.py --workers 4 &
+    python -m benchmarks.load_test --url http://127.0.0.1:8080 --concurrency 32 --duration 30
+    python -m benchmarks.load_test --stub-server --workers 2 --threads 4 --rate 400 --duration 10
+"""
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import signal
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from benchmarks.corpus import QUERY_CORPUS
+
+
+def percentile(samples, p):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+class StubSearchService:
+    """Stands in for SearchService: every search sleeps for a fixed latency"""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def search(self, user_query, deadline=None):
+        time.sleep(self.latency)
+        return {'success': True, 'results': [{'id': 1}], 'search_type': 'sql', 'error': None}
+
+    hybrid_search = semantic_search = search
+
+
+def start_stub_server(port, workers, threads, queue_size, latency):
+    """Fork a server process serving StubSearchService; returns its pid"""
+    import server
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            server.serve("127.0.0.1", port, workers, threads, queue_size, 5,
+                         service_factory=lambda: StubSearchService(latency))
+        finally:
+            os._exit(0)
+    time.sleep(1.0)
+    return pid
+
+
+class LoadGenerator:
+    def __init__(self, url, endpoint, timeout):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.endpoint = endpoint
+        self.timeout = timeout
+        self.questions = itertools.cycle([question for question, _ in QUERY_CORPUS])
+        self._lock = threading.Lock()
+        self.statuses = Counter()
+        self.latencies = []
+
+    def one(self):
+        with self._lock:
+            question = next(self.questions)
+        body = json.dumps({"query": question})
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            conn.request("POST", self.endpoint, body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            status = response.status
+        except OSError as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.statuses[status] += 1
+            if status == 200:
+                self.latencies.append(elapsed)
+
+    def closed_loop(self, concurrency, duration):
+        stop_at = time.monotonic() + duration
+
+        def client():
+            while time.monotonic() < stop_at:
+                self.one()
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def open_loop(self, rate, duration, max_in_flight):
+        interval = 1.0 / rate
+        with ThreadPoolExecutor(max_workers=max_in_flight) as pool:
+            start = time.monotonic()
+            for i in range(int(rate * duration)):
+                delay = start + i * interval - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self.one)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--endpoint", default="/search", choices=["/search", "/hybrid", "/semantic"])
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop clients")
+    parser.add_argument("--rate", type=float, help="open-loop requests per second")
+    parser.add_argument("--max-in-flight", type=int, default=512, help="open-loop client connections")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--stub-server", action="store_true", help="start a local server with a sleeping stub service")
+    parser.add_argument("--port", type=int, default=18080, help="stub server port")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--queue-size", type=int, default=16)
+    parser.add_argument("--service-latency-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    server_pid = None
+    url = args.url
+    if args.stub_server:
+        server_pid = start_stub_server(
+            args.port, args.workers, args.threads, args.queue_size, args.service_latency_ms / 1000
+        )
+        url = f"http://127.0.0.1:{args.port}"
+
+    generator = LoadGenerator(url, args.endpoint, args.timeout)
+    started = time.perf_counter()
+    try:
+        if args.rate:
+            generator.open_loop(args.rate, args.duration, args.max_in_flight)
+        else:
+            generator.closed_loop(args.concurrency, args.duration)
+    finally:
+        if server_pid:
+            os.kill(server_pid, signal.SIGTERM)
+            os.waitpid(server_pid, 0)
+    elapsed = time.perf_counter() - started
+
+    total = sum(generator.statuses.values())
+    print(f"requests={total} seconds={elapsed:.1f} throughput={total / elapsed:.1f} req/s")
+    print("status   " + "  ".join(f"{status}={count}" for status, count in sorted(generator.statuses.items(), key=str)))
+    if generator.latencies:
+        ok = generator.latencies
+        print(
+            f"200 OK   ok/s={len(ok) / elapsed:.1f} "
+            f"p50={percentile(ok, 0.50) * 1000:.1f}ms "
+            f"p95={percentile(ok, 0.95) * 1000:.1f}ms "
+            f"p99={percentile(ok, 0.99) * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Check read-replica routing against a real primary and streaming standby.
+
+DB_HOST/DB_PORT must point at the primary and DB_REPLICA_DSNS at one standby
+(e.g. made with ``pg_basebackup -R``), connecting as a superuser so the check
+can pause WAL replay and terminate backends on the standby. Steps:
+
+  routing    replica=True reads run on the standby, other reads on the primary
+  lag        with replay paused and the primary writing, the standby is
+             excluded once it lags by more than --max-lag and reads fall back
+  recovery   after replay resumes the standby is back in rotation
+  fallback   when the standby drops the pool's connections mid-flight, the read
+             is retried on the primary and the standby is marked unhealthy
+
+Exits non-zero if any step fails.
+"""
+
+import argparse
+import sys
+import time
+import psycopg2
+from config import Config
+from database.connection import DatabaseConnection
+from database.replicas import get_replica_router
+
+
+def served_by(db, replica):
+    rows = db.execute_query("SELECT pg_is_in_recovery() AS standby", replica=replica)
+    return "standby" if rows[0]["standby"] else "primary"
+
+
+def connect(dsn=None):
+    if dsn is None:
+        conn = psycopg2.connect(**DatabaseConnection()._connect_kwargs())
+    else:
+        conn = psycopg2.connect(dsn)
+    conn.autocommit = True
+    return conn
+
+
+def execute(conn, sql):
+    with conn.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchone()[0] if cursor.description else None
+
+
+def write_on_primary(primary):
+    # A committed transaction in the WAL, without touching any table
+    execute(primary, "SELECT pg_logical_emit_message(true, 'schemasight', 'replica check')")
+
+
+def wait_for(predicate, timeout, poll=0.2):
+    give_up_at = time.monotonic() + timeout
+    while time.monotonic() < give_up_at:
+        if predicate():
+            return True
+        time.sleep(poll)
+    return predicate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-lag", type=float, default=2.0, help="DB_REPLICA_MAX_LAG_SECONDS for the check")
+    args = parser.parse_args()
+
+    if len(Config.DB_REPLICA_DSNS) != 1:
+        parser.error("set DB_REPLICA_DSNS to exactly one standby")
+    Config.DB_REPLICA_MAX_LAG_SECONDS = args.max_lag
+    # The steps below run the health checks themselves
+    Config.DB_REPLICA_CHECK_INTERVAL_SECONDS = 3600
+
+    db = DatabaseConnection()
+    router = get_replica_router()
+    node = router.replicas[0]
+    primary = connect()
+    standby = connect(node.dsn)
+    results = []
+
+    def record(step, ok, detail):
+        results.append((step, ok, detail))
+        print(f"{'PASS' if ok else 'FAIL'}  {step:<10} {detail}")
+
+    if execute(primary, "SELECT pg_is_in_recovery()") or not execute(standby, "SELECT pg_is_in_recovery()"):
+        parser.error("DB_HOST/DB_PORT must be the primary and DB_REPLICA_DSNS its standby")
+
+    # Make sure the standby has replayed a transaction, so its lag can be measured
+    write_on_primary(primary)
+    wait_for(lambda: (router.check(node), node.lag_seconds == 0)[1], timeout=10)
+
+    reads = (served_by(db, replica=True), served_by(db, replica=False))
+    record("routing", reads == ("standby", "primary"), f"replica read on {reads[0]}, primary read on {reads[1]}")
+
+    execute(standby, "SELECT pg_wal_replay_pause()")
+    try:
+        write_on_primary(primary)
+        excluded = wait_for(
+            lambda: (router.check(node), not node.available(router.max_lag))[1],
+            timeout=args.max_lag + 10,
+        )
+        read = served_by(db, replica=True)
+        record(
+            "lag", excluded and read == "primary",
+            f"lag={node.lag_seconds}s (max {router.max_lag}s), replica read on {read}",
+        )
+    finally:
+        execute(standby, "SELECT pg_wal_replay_resume()")
+
+    back = wait_for(lambda: (router.check(node), node.available(router.max_lag))[1], timeout=10)
+    read = served_by(db, replica=True)
+    record("recovery", back and read == "standby", f"lag={node.lag_seconds}s, replica read on {read}")
+
+    terminated = execute(standby, """
+        SELECT count(pg_terminate_backend(pid)) FROM pg_stat_activity
+        WHERE backend_type = 'client backend' AND pid <> pg_backend_pid()
+    """)
+    read = served_by(db, replica=True)
+    marked = not router.status()[node.name]["healthy"]
+    record(
+        "fallback", terminated > 0 and read == "primary" and marked,
+        f"terminated {terminated} standby connections, replica read on {read}, marked unhealthy={marked}",
+    )
+    router.check(node)
+    record("rejoin", node.available(router.max_lag), "standby healthy again after the next health check")
+
+    router.stop()
+    primary.close()
+    standby.close()
+    return 0 if all(ok for _, ok, _ in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+"""
+End-to-end SchemaSight benchmark.
+
+Loads scaled synthetic data into a local Postgres with pgvector, replaces
+the LLM with a local stub backend returning canned SQL, then replays a
+query corpus through SearchService.search, SearchService.hybrid_search and
+EmbeddingService.populate_all_embeddings. Reports throughput and
+p50/p95/p99 per stage and stores the results for regression comparison.
+
+Start a disposable database first, e.g.:
+    docker run -d -p 5433:5432 -e POSTGRES_PASSWORD=bench pgvector/pgvector:pg16
+    export DB_PORT=5433 DB_PASSWORD=bench DB_NAME=schemasight_bench
+
+Usage:
+    python -m benchmarks.run_benchmarks --scale 10 --concurrency 8 --iterations 5
+    python -m benchmarks.run_benchmarks --skip-load --compare benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from benchmarks.corpus import HYBRID_CORPUS, QUERY_CORPUS, build_stub_backend
+from logger_config import get_logger
+
+logger = get_logger("benchmarks")
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def percentile(samples, p):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(p * (len(ordered) - 1))))]
+
+
+def summarize(samples_ms):
+    return {
+        "count": len(samples_ms),
+        "p50_ms": percentile(samples_ms, 0.50),
+        "p95_ms": percentile(samples_ms, 0.95),
+        "p99_ms": percentile(samples_ms, 0.99),
+        "mean_ms": sum(samples_ms) / len(samples_ms) if samples_ms else None,
+    }
+
+
+def prepare_database(scale, seed, streams):
+    """Recreate the schema and bulk-load synthetic data; returns load statistics"""
+    import setup_database
+    from database.connection import DatabaseConnection
+    from database.synthetic_data import SyntheticDataGenerator, SyntheticDataLoader
+
+    setup_database.create_database()
+    setup_database.ensure_pgvector_extension()
+    setup_database.run_sql_file("schema.sql")
+
+    loader = SyntheticDataLoader(DatabaseConnection(), SyntheticDataGenerator(scale=scale, seed=seed), streams=streams)
+    return loader.load()
+
+
+def bench_populate_embeddings(embedding_service):
+    start = time.perf_counter()
+    embedding_service.populate_all_embeddings()
+    return {"seconds": time.perf_counter() - start}
+
+
+def replay(label, func, questions, concurrency, iterations):
+    """Run every question ``iterations`` times at the given concurrency"""
+    workload = [question for _ in range(iterations) for question in questions]
+    stage_samples = defaultdict(list)
+    wall_samples = []
+    failures = 0
+
+    def one(question):
+        start = time.perf_counter()
+        result = func(question)
+        return (time.perf_counter() - start) * 1000, result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for wall_ms, result in pool.map(one, workload):
+            wall_samples.append(wall_ms)
+            if not result.get("success"):
+                failures += 1
+            for stage, ms in result.get("timings", {}).items():
+                stage_samples[stage].append(ms)
+    elapsed = time.perf_counter() - start
+
+    summary = {
+        "requests": len(workload),
+        "failures": failures,
+        "throughput_rps": len(workload) / elapsed,
+        "end_to_end": summarize(wall_samples),
+        "stages": {stage: summarize(samples) for stage, samples in sorted(stage_samples.items())},
+    }
+    logger.info("%s: %d requests in %.2fs (%.1f req/s, %d failures)",
+                label, len(workload), elapsed, summary["throughput_rps"], failures)
+    return summary
+
+
+def print_report(report):
+    for section in ("search", "hybrid_search"):
+        data = report[section]
+        print(f"\n== {section}: {data['throughput_rps']:.1f} req/s, "
+              f"{data['failures']}/{data['requests']} failed")
+        print(f"{'stage':<26}{'count':>7}{'p50':>10}{'p95':>10}{'p99':>10}")
+        rows = [("end_to_end", data["end_to_end"])] + list(data["stages"].items())
+        for stage, stats in rows:
+            print(f"{stage:<26}{stats['count']:>7}{stats['p50_ms']:>10.1f}"
+                  f"{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    if "populate_embeddings" in report:
+        print(f"\npopulate_all_embeddings: {report['populate_embeddings']['seconds']:.2f}s")
+
+
+def compare(report, baseline, threshold):
+    """Print p95 deltas against a baseline; returns the list of regressions"""
+    regressions = []
+    print(f"\n== comparison against {baseline['meta']['timestamp']} (threshold {threshold:.0%})")
+    for section in ("search", "hybrid_search"):
+        current = {"end_to_end": report[section]["end_to_end"], **report[section]["stages"]}
+        previous = {"end_to_end": baseline[section]["end_to_end"], **baseline[section]["stages"]}
+        for stage in sorted(set(current) & set(previous)):
+            old, new = previous[stage]["p95_ms"], current[stage]["p95_ms"]
+            if not old:
+                continue
+            change = (new - old) / old
+            marker = "REGRESSION" if change > threshold else ""
+            print(f"{section + '.' + stage:<40}{old:>10.1f} -> {new:>10.1f} ms ({change:+.1%}) {marker}")
+            if change > threshold:
+                regressions.append(f"{section}.{stage}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="synthetic data scale factor")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--streams", type=int, help="parallel COPY streams for the data load")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=3, help="passes over the query corpus")
+    parser.add_argument("--llm-latency-ms", type=float, default=300, help="median stub LLM latency")
+    parser.add_argument("--skip-load", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--output", help="where to write the JSON report (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline JSON report to compare p95 latencies against")
+    parser.add_argument("--regression-threshold", type=float, default=0.10)
+    args = parser.parse_args()
+
+    from services.embedding_service import EmbeddingService
+    from services.query_generator import QueryGenerator
+    from services.search_service import SearchService
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "args": vars(args),
+        }
+    }
+
+    if not args.skip_load:
+        report["load"] = prepare_database(args.scale, args.seed, args.streams)
+
+    embedding_service = EmbeddingService()
+    if not args.skip_load:
+        import setup_database
+        report["populate_embeddings"] = bench_populate_embeddings(embedding_service)
+        report["load"]["indexes"] = {"seconds": setup_database.create_indexes()}
+
+    search_service = SearchService(
+        query_generator=QueryGenerator(llm=build_stub_backend(args.llm_latency_ms)),
+        embedding_service=embedding_service,
+    )
+    search_service.db.warm_schema_registry()
+
+    questions = [question for question, _ in QUERY_CORPUS]
+    hybrid_questions = [question for question, _ in HYBRID_CORPUS]
+    report["search"] = replay("search", search_service.search, questions, args.concurrency, args.iterations)
+    report["hybrid_search"] = replay(
+        "hybrid_search", search_service.hybrid_search, hybrid_questions, args.concurrency, args.iterations
+    )
+    report["coalescing"] = search_service.coalescing_stats()
+
+    print_report(report)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.regression_threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
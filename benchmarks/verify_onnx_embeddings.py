@@ -0,0 +1,123 @@
+"""
+Verify and benchmark the ONNX embedding backend against PyTorch.
+
+Exports the model first if needed, then for each backend (torch, onnx fp32,
+onnx int8):
+  - cosine agreement with the PyTorch embeddings (min / mean / p01)
+  - batch throughput (texts/s) and single-text latency (p50 / p95)
+  - resident memory after loading and encoding (measured in a fresh process)
+
+Usage:
+    python -m benchmarks.verify_onnx_embeddings --texts 2000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+
+BACKENDS = ("torch", "onnx-fp32", "onnx-int8")
+
+PROBE = r"""
+import json, resource, sys, time
+import numpy as np
+backend, model_dir, texts_path, out_path = sys.argv[1:5]
+texts = json.load(open(texts_path))
+if backend == "torch":
+    from sentence_transformers import SentenceTransformer
+    from config import Config
+    model = SentenceTransformer(Config.EMBEDDING_MODEL, device="cpu")
+else:
+    from services.onnx_embedding import OnnxSentenceEncoder
+    model = OnnxSentenceEncoder(model_dir, quantized=backend == "onnx-int8")
+model.encode(texts[:8], convert_to_numpy=True)
+
+start = time.perf_counter()
+embeddings = model.encode(texts, convert_to_numpy=True, batch_size=64)
+batch_seconds = time.perf_counter() - start
+
+latencies = []
+for text in texts[:200]:
+    t = time.perf_counter()
+    model.encode(text, convert_to_numpy=True)
+    latencies.append(time.perf_counter() - t)
+latencies.sort()
+
+np.save(out_path, np.asarray(embeddings, dtype=np.float32))
+print("RESULT " + json.dumps({
+    "throughput": len(texts) / batch_seconds,
+    "p50_ms": latencies[len(latencies) // 2] * 1000,
+    "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def corpus(size):
+    from database.synthetic_data import SyntheticDataGenerator
+    generator = SyntheticDataGenerator(scale=max(0.01, size / 1000))
+    texts = [row[0] for row in generator.rows("products")]
+    texts += [row[0] for row in generator.rows("employees")]
+    texts += ["find products similar to wireless headphones", "employee named Priya in engineering"]
+    return texts[:size]
+
+
+def run_backend(backend, model_dir, texts_path, workdir):
+    out_path = os.path.join(workdir, f"{backend}.npy")
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE, backend, model_dir, texts_path, out_path],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{backend} probe failed:\n{completed.stderr[-2000:]}")
+    line = next(line for line in completed.stdout.splitlines() if line.startswith("RESULT "))
+    return json.loads(line[len("RESULT "):]), np.load(out_path)
+
+
+def main():
+    import tempfile
+    from config import Config
+    from services.onnx_embedding import FP32_FILE, INT8_FILE, export_onnx, quantize_int8
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=Config.EMBEDDING_ONNX_DIR)
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--min-cosine", type=float, default=0.99,
+                        help="fail if any embedding agrees with PyTorch less than this")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(args.model_dir, FP32_FILE)):
+        export_onnx(Config.EMBEDDING_MODEL, args.model_dir)
+    if not os.path.exists(os.path.join(args.model_dir, INT8_FILE)):
+        quantize_int8(args.model_dir)
+
+    texts = corpus(args.texts)
+    with tempfile.TemporaryDirectory() as workdir:
+        texts_path = os.path.join(workdir, "texts.json")
+        with open(texts_path, "w", encoding="utf-8") as f:
+            json.dump(texts, f)
+        results = {backend: run_backend(backend, args.model_dir, texts_path, workdir) for backend in BACKENDS}
+
+    reference = results["torch"][1]
+    print(f"{'backend':<12}{'dim':>5}{'cos min':>9}{'cos mean':>10}{'cos p01':>9}"
+          f"{'texts/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'RSS MB':>9}")
+    failed = False
+    for backend in BACKENDS:
+        stats, embeddings = results[backend]
+        cosine = np.sum(reference * embeddings, axis=1) / (
+            np.linalg.norm(reference, axis=1) * np.linalg.norm(embeddings, axis=1)
+        )
+        failed |= backend != "torch" and cosine.min() < args.min_cosine
+        print(f"{backend:<12}{embeddings.shape[1]:>5}{cosine.min():>9.4f}{cosine.mean():>10.4f}"
+              f"{np.percentile(cosine, 1):>9.4f}{stats['throughput']:>10.0f}{stats['p50_ms']:>9.2f}"
+              f"{stats['p95_ms']:>9.2f}{stats['rss_mb']:>9.0f}")
+    if failed:
+        print(f"\nAgreement below --min-cosine {args.min_cosine}; keep EMBEDDING_BACKEND=torch "
+              f"or use the fp32 model")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,102 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
 
+    # Connection pool shared by every DatabaseConnection in the process
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+
+    # Read replicas for validated SELECTs and semantic searches: comma-separated
+    # libpq DSNs, e.g. "host=replica1 dbname=nl_search_db user=postgres password=..."
+    DB_REPLICA_DSNS = [dsn.strip() for dsn in os.getenv('DB_REPLICA_DSNS', '').split(',') if dsn.strip()]
+    # Replicas lagging the primary by more than this get no traffic
+    DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv('DB_REPLICA_MAX_LAG_SECONDS', '5'))
+    DB_REPLICA_CHECK_INTERVAL_SECONDS = float(os.getenv('DB_REPLICA_CHECK_INTERVAL_SECONDS', '5'))
+
     # Standard environment variable name for Groq
     GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
 
+    # Embedding model, loaded lazily once per process
+    EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'all-MiniLM-L6-v2')
+    # torch (sentence-transformers) or onnx (ONNX Runtime, see services/onnx_embedding.py)
+    EMBEDDING_BACKEND = os.getenv('EMBEDDING_BACKEND', 'torch').lower()
+    EMBEDDING_ONNX_DIR = os.getenv('EMBEDDING_ONNX_DIR', 'models/all-MiniLM-L6-v2-onnx')
+    EMBEDDING_ONNX_QUANTIZED = os.getenv('EMBEDDING_ONNX_QUANTIZED', 'False').lower() == 'true'
+    # Load models at startup instead of on the first request
+    WARM_UP_MODELS = os.getenv('WARM_UP_MODELS', 'False').lower() == 'true'
+    # Query embeddings kept in memory (also filled by batched encodes in search_many)
+    EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '1024'))
+
+    # Semantic search retrieval: fusion (lexical + vector), vector or lexical
+    SEMANTIC_SEARCH_MODE = os.getenv('SEMANTIC_SEARCH_MODE', 'fusion').lower()
+    # Lexical top score at or above which the embedding step is skipped
+    LEXICAL_CONFIDENCE_THRESHOLD = float(os.getenv('LEXICAL_CONFIDENCE_THRESHOLD', '0.8'))
+    # Weight of the lexical score when fusing with vector similarity
+    LEXICAL_FUSION_WEIGHT = float(os.getenv('LEXICAL_FUSION_WEIGHT', '0.4'))
+
+    # LLM providers; setting LLM_BACKUP_PROVIDER enables hedged requests
+    LLM_PRIMARY_PROVIDER = os.getenv('LLM_PRIMARY_PROVIDER', 'groq')
+    LLM_PRIMARY_MODEL = os.getenv('LLM_PRIMARY_MODEL', 'llama-3.3-70b-versatile')
+    LLM_BACKUP_PROVIDER = os.getenv('LLM_BACKUP_PROVIDER', '')
+    LLM_BACKUP_MODEL = os.getenv('LLM_BACKUP_MODEL', 'llama-3.1-8b-instant')
+    LLM_BACKUP_API_KEY = os.getenv('LLM_BACKUP_API_KEY', '')
+    LLM_BACKUP_BASE_URL = os.getenv('LLM_BACKUP_BASE_URL', '')
+    # Backup fires once the primary is slower than this percentile of its recent latencies
+    LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '0.95'))
+    LLM_HEDGE_MIN_DELAY_SECONDS = float(os.getenv('LLM_HEDGE_MIN_DELAY_SECONDS', '0.05'))
+    # Provider quota shared by all LLM calls in the process; 0 disables the limit
+    LLM_RATE_LIMIT_PER_SECOND = float(os.getenv('LLM_RATE_LIMIT_PER_SECOND', '0'))
+    LLM_RATE_LIMIT_BURST = int(os.getenv('LLM_RATE_LIMIT_BURST', '5'))
+    # Retries for rate-limited or unreachable providers, with exponential backoff
+    LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+    LLM_RETRY_BACKOFF_SECONDS = float(os.getenv('LLM_RETRY_BACKOFF_SECONDS', '0.5'))
+
+    # Stream SQL generation in the UI and stop it early on forbidden statements
+    STREAM_SQL_GENERATION = os.getenv('STREAM_SQL_GENERATION', 'True').lower() == 'true'
+
+    # Result table: rows rendered per page and rows per chunk when exporting
+    RESULTS_PAGE_SIZE = int(os.getenv('RESULTS_PAGE_SIZE', '50'))
+    EXPORT_CHUNK_ROWS = int(os.getenv('EXPORT_CHUNK_ROWS', '10000'))
+
+    # Latency budgets
+    SEARCH_TIMEOUT_SECONDS = float(os.getenv('SEARCH_TIMEOUT_SECONDS', '20'))
+    LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', '10'))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000'))
+    # Minimum budget the SQL path needs; below this searches go straight to the semantic fallback
+    SQL_PATH_MIN_BUDGET_SECONDS = float(os.getenv('SQL_PATH_MIN_BUDGET_SECONDS', '2'))
+
+    # search_many: questions processed concurrently
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '8'))
+
+    # Speculative prefetch of suggested follow-up questions (off by default: it spends LLM quota)
+    PREFETCH_ENABLED = os.getenv('PREFETCH_ENABLED', 'False').lower() == 'true'
+    PREFETCH_SUGGESTIONS = int(os.getenv('PREFETCH_SUGGESTIONS', '3'))
+    PREFETCH_BUDGET_SECONDS = float(os.getenv('PREFETCH_BUDGET_SECONDS', '20'))
+    # LLM calls one prefetch round may make, including the suggestion call
+    PREFETCH_MAX_LLM_CALLS = int(os.getenv('PREFETCH_MAX_LLM_CALLS', '5'))
+    # Planner cost above which prefetch stores only the SQL instead of running it
+    PREFETCH_MAX_QUERY_COST = float(os.getenv('PREFETCH_MAX_QUERY_COST', '10000'))
+    PREFETCH_MAX_WORKERS = int(os.getenv('PREFETCH_MAX_WORKERS', '4'))
+    PREFETCH_TTL_SECONDS = float(os.getenv('PREFETCH_TTL_SECONDS', '300'))
+    PREFETCH_CACHE_SIZE = int(os.getenv('PREFETCH_CACHE_SIZE', '64'))
+
+    # Circuit breaker around the LLM client
+    LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv('LLM_BREAKER_FAILURE_THRESHOLD', '5'))
+    LLM_BREAKER_RESET_SECONDS = float(os.getenv('LLM_BREAKER_RESET_SECONDS', '30'))
+
     DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
 
+    # Headless HTTP server (server.py)
+    SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.getenv('SERVER_PORT', '8080'))
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str(os.cpu_count() or 2)))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', '8'))
+    # Requests a worker queues beyond its busy threads before answering 429
+    SERVER_QUEUE_SIZE = int(os.getenv('SERVER_QUEUE_SIZE', '32'))
+    SERVER_SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv('SERVER_SHUTDOWN_TIMEOUT_SECONDS', '30'))
+
+    # Port for the Prometheus /metrics endpoint; 0 disables it
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))
+
     logger.debug(
         "Config initialized | DB_HOST=%s | DB_PORT=%s | DB_NAME=%s | DB_USER=%s | DEBUG=%s",
         DB_HOST, DB_PORT, DB_NAME, DB_USER, DEBUG
@@ -1,56 +1,241 @@
+import threading
 import psycopg2
+from psycopg2 import pool
 from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
 from config import Config
+from database.prepared import PreparedConnection, prepared_statements
+from database.replicas import ReplicaUnavailable, get_replica_router
+from database.schema_registry import KNOWN_TABLES, schema_registry
+from utils.deadline import DeadlineExceeded
+from utils.metrics import span
 from logger_config import get_logger
 
 logger = get_logger("database")
 
+prepared_statements.register(
+    "table_exists",
+    """
+    SELECT EXISTS (
+        SELECT FROM information_schema.tables
+        WHERE table_name = $1
+    )
+    """,
+    ("text",),
+)
+
+
+class BlockingConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that waits for a free connection instead of raising"""
+
+    def __init__(self, minconn, maxconn, *args, **kwargs):
+        self._slots = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None, timeout=None):
+        """
+        Wait for a free connection
+        :param timeout: seconds to wait at most (None waits indefinitely);
+            raises DeadlineExceeded when no connection frees up in time
+        """
+        if not self._slots.acquire(timeout=timeout):
+            raise DeadlineExceeded(f"No database connection available within {timeout:.3f}s")
+        try:
+            return super().getconn(key)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        # A rejected putconn (e.g. a connection this pool never handed out) frees no slot
+        super().putconn(conn, key, close)
+        self._slots.release()
+
+
 class DatabaseConnection:
     """Manages PostgreSQL database connections"""
 
+    _pools = {}
+    _pools_lock = threading.Lock()
+
     def __init__(self):
         self.config = Config
         logger.debug("DatabaseConnection initialized")
 
-    def get_connection(self):
-        """Create a new database connection"""
-        logger.info("Creating database connection")
+    def _connect_kwargs(self):
+        return {
+            "host": self.config.DB_HOST,
+            "port": self.config.DB_PORT,
+            "database": self.config.DB_NAME,
+            "user": self.config.DB_USER,
+            "password": self.config.DB_PASSWORD,
+            # Server-side ceiling for every statement; deadlines can only tighten it
+            "options": f"-c statement_timeout={self.config.DB_STATEMENT_TIMEOUT_MS}",
+        }
+
+    def _get_pool(self):
+        """Return the process-wide pool for this database, creating it on first use"""
+        kwargs = self._connect_kwargs()
+        key = (kwargs["host"], kwargs["port"], kwargs["database"], kwargs["user"])
+        with self._pools_lock:
+            conn_pool = self._pools.get(key)
+            if conn_pool is None:
+                logger.info(
+                    "Creating connection pool | min=%d | max=%d",
+                    self.config.DB_POOL_MIN_SIZE, self.config.DB_POOL_MAX_SIZE
+                )
+                conn_pool = BlockingConnectionPool(
+                    self.config.DB_POOL_MIN_SIZE,
+                    self.config.DB_POOL_MAX_SIZE,
+                    connection_factory=PreparedConnection,
+                    **kwargs
+                )
+                self._pools[key] = conn_pool
+            return conn_pool
+
+    def get_connection(self, conn_pool=None, deadline=None):
+        """
+        Check a connection out of the shared pool (the primary's unless another is given)
+        :param deadline: optional Deadline; waiting for a free connection counts against it
+        """
+        logger.debug("Checking out database connection")
+        timeout = deadline.timeout_for("database connection") if deadline is not None else None
         try:
-            conn = psycopg2.connect(
-                host=self.config.DB_HOST,
-                port=self.config.DB_PORT,
-                database=self.config.DB_NAME,
-                user=self.config.DB_USER,
-                password=self.config.DB_PASSWORD
-            )
-            logger.info("Database connection established successfully")
-            return conn
+            with span("db_checkout"):
+                return (conn_pool or self._get_pool()).getconn(timeout=timeout)
         except psycopg2.Error as e:
             logger.error("Database connection failed", exc_info=True)
             raise Exception(f"Database connection failed: {str(e)}")
 
+    def release_connection(self, conn, conn_pool=None):
+        """Return a connection to the pool, discarding it if it is broken"""
+        (conn_pool or self._get_pool()).putconn(conn, close=bool(conn.closed))
+
+    def _reset_after_error(self, conn):
+        """Roll back and drop server-side prepared statements so bookkeeping stays in sync"""
+        if conn.closed:
+            return
+        try:
+            conn.rollback()
+            if conn.prepared:
+                with conn.cursor() as cursor:
+                    cursor.execute("DEALLOCATE ALL")
+                conn.commit()
+                conn.forget_prepared()
+        except psycopg2.Error:
+            logger.warning("Could not reset connection after error, closing it", exc_info=True)
+            conn.close()
+
+    def _apply_deadline(self, cursor, deadline):
+        """Tighten statement_timeout for this transaction to fit the remaining budget"""
+        if deadline is None:
+            return
+        timeout_ms = int(deadline.timeout_for("database query") * 1000)
+        if timeout_ms < self.config.DB_STATEMENT_TIMEOUT_MS:
+            cursor.execute("SET LOCAL statement_timeout = %s", (max(timeout_ms, 1),))
+
     @contextmanager
-    def get_cursor(self, dict_cursor=True):
+    def get_cursor(self, dict_cursor=True, deadline=None):
         """Context manager for database cursor"""
         logger.debug("Opening database cursor | dict_cursor=%s", dict_cursor)
-        conn = self.get_connection()
+        conn = self.get_connection(deadline=deadline)
         cursor = conn.cursor(cursor_factory=RealDictCursor if dict_cursor else None)
         try:
             yield cursor
             conn.commit()
             logger.debug("Transaction committed")
         except Exception as e:
-            conn.rollback()
+            self._reset_after_error(conn)
             logger.error("Transaction rolled back due to error", exc_info=True)
             raise e
         finally:
             cursor.close()
-            conn.close()
-            logger.debug("Cursor and connection closed")
+            self.release_connection(conn)
+            logger.debug("Cursor closed and connection returned to pool")
+
+    @contextmanager
+    def get_maintenance_cursor(self):
+        """Cursor for setup DDL and bulk maintenance, exempt from DB_STATEMENT_TIMEOUT_MS"""
+        with self.get_cursor(dict_cursor=False) as cursor:
+            # Index builds and ANALYZE on large tables run far past the request ceiling
+            cursor.execute("SET LOCAL statement_timeout = 0")
+            yield cursor
+
+    @contextmanager
+    def get_replica_cursor(self, router, replica, deadline=None):
+        """
+        Cursor on a replica acquired from the router (read-only transaction)
+        Raises ReplicaUnavailable when the replica's connection fails; the
+        replica is then marked unhealthy until its next health check.
+        """
+        failed = False
+        try:
+            try:
+                conn = self.get_connection(replica.pool, deadline=deadline)
+            except DeadlineExceeded:
+                # A busy pool is not a broken replica
+                raise
+            except Exception as e:
+                failed = True
+                raise ReplicaUnavailable(f"{replica.name}: {str(e)}")
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            try:
+                yield cursor
+                conn.commit()
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+                self._reset_after_error(conn)
+                if isinstance(e, psycopg2.extensions.QueryCanceledError):
+                    raise
+                failed = True
+                raise ReplicaUnavailable(f"{replica.name}: {str(e).strip()}")
+            except Exception:
+                self._reset_after_error(conn)
+                raise
+            finally:
+                cursor.close()
+                self.release_connection(conn, replica.pool)
+        finally:
+            router.release(replica, failed=failed)
+
+    def _run_read(self, run, replica=False, deadline=None):
+        """
+        Run ``run(cursor)`` on a replica when ``replica`` is set and replicas are
+        configured, otherwise (or if the replica is unavailable) on the primary
+        """
+        router = get_replica_router() if replica else None
+        node = router.acquire() if router is not None else None
+        if node is not None:
+            try:
+                with self.get_replica_cursor(router, node, deadline=deadline) as cursor:
+                    return run(cursor)
+            except ReplicaUnavailable as e:
+                logger.warning("Replica read failed, using the primary: %s", e)
+        with self.get_cursor(deadline=deadline) as cursor:
+            return run(cursor)
+
+    def warm_schema_registry(self, tables=KNOWN_TABLES):
+        """Check existence of all tables once so later queries skip the lookup"""
+        with self.get_cursor(dict_cursor=False) as cursor:
+            return schema_registry.refresh(cursor, tables)
+
+    def ensure_table_exists(self, table_name: str, cursor=None):
+        """
+        Check if a table exists, and create it if missing
+        :param cursor: open cursor to run the check in; a new one is used if omitted.
+            Returns True when the table exists in that cursor's transaction; the
+            caller marks it in the schema registry once the transaction commits,
+            so a rolled-back CREATE TABLE is never cached as present
+        """
+        if schema_registry.is_known(table_name):
+            return True
+
+        if cursor is None:
+            with self.get_cursor(dict_cursor=False) as own_cursor:
+                present = self.ensure_table_exists(table_name, cursor=own_cursor)
+            if present:
+                schema_registry.mark_present(table_name)
+            return present
 
-    def ensure_table_exists(self, table_name: str):
-        """Check if a table exists, and create it if missing"""
         logger.debug("Checking if table '%s' exists", table_name)
         create_table_queries = {
             "departments": """
@@ -63,38 +248,42 @@ class DatabaseConnection:
 
         if table_name not in create_table_queries:
             logger.warning("No create query defined for table '%s'", table_name)
-            return
+            return False
 
-        with self.get_cursor(dict_cursor=False) as cursor:
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_name = %s
-                )
-            """, (table_name,))
-            exists = cursor.fetchone()[0]
+        prepared_statements.execute(cursor, "table_exists", (table_name,))
+        row = cursor.fetchone()
+        exists = row[0] if isinstance(row, tuple) else row["exists"]
 
-            if not exists:
-                logger.info("Table '%s' does not exist. Creating now.", table_name)
-                cursor.execute(create_table_queries[table_name])
-                logger.info("Table '%s' created successfully", table_name)
-            else:
-                logger.debug("Table '%s' already exists", table_name)
+        if not exists:
+            logger.info("Table '%s' does not exist. Creating now.", table_name)
+            cursor.execute(create_table_queries[table_name])
+            logger.info("Table '%s' created successfully", table_name)
+        else:
+            logger.debug("Table '%s' already exists", table_name)
+        return True
 
-    def execute_query(self, query, params=None, fetch=True, ensure_tables=None):
+    def execute_query(self, query, params=None, fetch=True, ensure_tables=None, deadline=None, replica=False):
         """
         Execute a query and return results
-        :param ensure_tables: list of tables to check/create before query
+        :param ensure_tables: list of tables to check/create before query; tables
+            already in the schema registry cost no extra round trip, the rest are
+            checked in the same transaction as the query
+        :param deadline: optional Deadline; the statement is cancelled when it runs out
+        :param replica: the query is a validated read and may run on a read replica
         """
-        if ensure_tables:
-            for table in ensure_tables:
-                self.ensure_table_exists(table)
-
         logger.debug(
-            "Executing query | fetch=%s | params_provided=%s",
-            fetch, params is not None
+            "Executing query | fetch=%s | params_provided=%s | replica=%s",
+            fetch, params is not None, replica
         )
-        with self.get_cursor() as cursor:
+
+        confirmed = []
+
+        def run(cursor):
+            for table in schema_registry.missing(ensure_tables or ()):
+                if self.ensure_table_exists(table, cursor=cursor):
+                    confirmed.append(table)
+
+            self._apply_deadline(cursor, deadline)
             cursor.execute(query, params)
             if fetch:
                 results = cursor.fetchall()
@@ -103,6 +292,48 @@ class DatabaseConnection:
             logger.info("Query executed successfully | no fetch")
             return None
 
+        try:
+            results = self._run_read(run, replica=replica and not ensure_tables, deadline=deadline)
+        except psycopg2.extensions.QueryCanceledError as e:
+            raise DeadlineExceeded(f"Query cancelled by statement timeout: {str(e).strip()}")
+        # Only now has any CREATE TABLE committed
+        schema_registry.mark_present(*confirmed)
+        return results
+
+    def execute_prepared(self, name, params=None, fetch=True, deadline=None, replica=False):
+        """
+        Execute a registered prepared statement by name and return results
+        :param replica: the statement only reads and may run on a read replica
+        """
+        logger.debug("Executing prepared statement '%s' | fetch=%s | replica=%s", name, fetch, replica)
+
+        def run(cursor):
+            self._apply_deadline(cursor, deadline)
+            prepared_statements.execute(cursor, name, params)
+            if fetch:
+                results = cursor.fetchall()
+                logger.info("Prepared statement '%s' executed | rows=%d", name, len(results))
+                return results
+            return None
+
+        try:
+            return self._run_read(run, replica=replica, deadline=deadline)
+        except psycopg2.extensions.QueryCanceledError as e:
+            raise DeadlineExceeded(f"Query cancelled by statement timeout: {str(e).strip()}")
+
+    def estimate_cost(self, query, params=None, deadline=None, replica=False):
+        """Planner's total cost estimate for a query (EXPLAIN without running it)"""
+        def run(cursor):
+            self._apply_deadline(cursor, deadline)
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+            return cursor.fetchone()["QUERY PLAN"]
+
+        try:
+            plan = self._run_read(run, replica=replica, deadline=deadline)
+        except psycopg2.extensions.QueryCanceledError as e:
+            raise DeadlineExceeded(f"Query cancelled by statement timeout: {str(e).strip()}")
+        return float(plan[0]["Plan"]["Total Cost"])
+
     def execute_many(self, query, data):
         """Execute a query with multiple parameter sets"""
         logger.info("Executing batch query | rows=%d", len(data))
@@ -110,6 +341,13 @@ class DatabaseConnection:
             cursor.executemany(query, data)
         logger.info("Batch query executed successfully")
 
+    def execute_prepared_many(self, name, data):
+        """Execute a registered prepared statement with multiple parameter sets"""
+        logger.info("Executing prepared batch '%s' | rows=%d", name, len(data))
+        with self.get_cursor(dict_cursor=False) as cursor:
+            prepared_statements.execute_batch(cursor, name, data)
+        logger.info("Prepared batch '%s' executed successfully", name)
+
     def test_connection(self):
         """Test database connection"""
         logger.info("Testing database connection")
@@ -0,0 +1,18 @@
+-- Secondary indexes, built after bulk loading and embedding population
+CREATE INDEX IF NOT EXISTS idx_employees_department ON employees(department_id);
+CREATE INDEX IF NOT EXISTS idx_employees_salary ON employees(salary);
+CREATE INDEX IF NOT EXISTS idx_orders_employee ON orders(employee_id);
+CREATE INDEX IF NOT EXISTS idx_orders_date ON orders(order_date);
+CREATE INDEX IF NOT EXISTS idx_products_price ON products(price);
+
+CREATE INDEX IF NOT EXISTS idx_employees_embedding ON employees USING ivfflat (name_embedding vector_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS idx_products_embedding ON products USING ivfflat (name_embedding vector_cosine_ops) WITH (lists = 100);
+CREATE INDEX IF NOT EXISTS idx_orders_embedding ON orders USING ivfflat (customer_name_embedding vector_cosine_ops) WITH (lists = 100);
+
+-- Lexical lookups (pg_trgm word similarity and full-text match) on name columns
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_employees_name_trgm ON employees USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_orders_customer_name_trgm ON orders USING gin (customer_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_name_fts ON products USING gin (to_tsvector('simple', name));
+CREATE INDEX IF NOT EXISTS idx_employees_name_fts ON employees USING gin (to_tsvector('simple', name));
+CREATE INDEX IF NOT EXISTS idx_orders_customer_name_fts ON orders USING gin (to_tsvector('simple', customer_name));
@@ -0,0 +1,96 @@
+import threading
+import psycopg2.extensions
+from psycopg2.extras import execute_batch
+from logger_config import get_logger
+
+logger = get_logger("prepared_statements")
+
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which statements it has prepared"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+    def forget_prepared(self):
+        """Drop local bookkeeping after the server-side statements were deallocated"""
+        self.prepared.clear()
+
+
+class PreparedStatement:
+    """A fixed SQL statement that is prepared once per connection and executed by name"""
+
+    def __init__(self, name, sql, param_types=()):
+        self.name = name
+        self.sql = sql.strip()
+        self.param_types = tuple(param_types)
+
+    @property
+    def prepare_sql(self):
+        if self.param_types:
+            return f"PREPARE {self.name} ({', '.join(self.param_types)}) AS {self.sql}"
+        return f"PREPARE {self.name} AS {self.sql}"
+
+    @property
+    def execute_sql(self):
+        if self.param_types:
+            placeholders = ", ".join(["%s"] * len(self.param_types))
+            return f"EXECUTE {self.name} ({placeholders})"
+        return f"EXECUTE {self.name}"
+
+
+class PreparedStatementRegistry:
+    """
+    Process-wide catalogue of prepared statements.
+
+    Statements are registered once (usually at import time) and prepared
+    lazily on each pooled connection the first time they are executed there.
+    """
+
+    def __init__(self):
+        self._statements = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, sql, param_types=()):
+        """Register a statement under a unique name"""
+        statement = PreparedStatement(name, sql, param_types)
+        with self._lock:
+            existing = self._statements.get(name)
+            if existing and (existing.sql, existing.param_types) != (statement.sql, statement.param_types):
+                raise ValueError(f"Prepared statement '{name}' is already registered with different SQL")
+            self._statements[name] = statement
+        logger.debug("Registered prepared statement '%s'", name)
+        return statement
+
+    def get(self, name):
+        try:
+            return self._statements[name]
+        except KeyError:
+            raise KeyError(f"Unknown prepared statement: {name}")
+
+    def ensure_prepared(self, cursor, name):
+        """PREPARE the statement on the cursor's connection if it is not prepared there yet"""
+        statement = self.get(name)
+        conn = cursor.connection
+        prepared = getattr(conn, "prepared", None)
+        if prepared is None:
+            raise TypeError("Connection was not created with PreparedConnection")
+        if name not in prepared:
+            logger.debug("Preparing statement '%s' on connection %s", name, id(conn))
+            cursor.execute(statement.prepare_sql)
+            prepared.add(name)
+        return statement
+
+    def execute(self, cursor, name, params=None):
+        """Execute a registered statement by name"""
+        statement = self.ensure_prepared(cursor, name)
+        cursor.execute(statement.execute_sql, params)
+
+    def execute_batch(self, cursor, name, data, page_size=100):
+        """Execute a registered statement for many parameter sets"""
+        statement = self.ensure_prepared(cursor, name)
+        execute_batch(cursor, statement.execute_sql, data, page_size=page_size)
+
+
+prepared_statements = PreparedStatementRegistry()
@@ -0,0 +1,182 @@
+import threading
+import psycopg2
+from config import Config
+from database.prepared import PreparedConnection
+from utils.metrics import metrics
+from logger_config import get_logger
+
+logger = get_logger("replicas")
+
+# Replay lag in seconds; 0 when fully caught up or when the server is not a standby
+LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+class ReplicaUnavailable(Exception):
+    """Raised when a replica cannot serve a query; the caller should retry on the primary"""
+
+
+class Replica:
+    """One read replica: its connection pool, in-flight request count and last health check"""
+
+    def __init__(self, dsn, name):
+        self.dsn = dsn
+        self.name = name
+        self.outstanding = 0
+        self.healthy = False
+        self.lag_seconds = None
+        self.last_error = None
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        with self._pool_lock:
+            if self._pool is None:
+                from database.connection import BlockingConnectionPool
+                self._pool = BlockingConnectionPool(
+                    Config.DB_POOL_MIN_SIZE,
+                    Config.DB_POOL_MAX_SIZE,
+                    self.dsn,
+                    connection_factory=PreparedConnection,
+                    # Generated SQL is validated, but replicas must never accept writes anyway
+                    options=(
+                        f"-c statement_timeout={Config.DB_STATEMENT_TIMEOUT_MS} "
+                        f"-c default_transaction_read_only=on"
+                    ),
+                )
+            return self._pool
+
+    def available(self, max_lag):
+        return self.healthy and self.lag_seconds is not None and self.lag_seconds <= max_lag
+
+    def status(self):
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag_seconds,
+            "outstanding": self.outstanding,
+            "last_error": self.last_error,
+        }
+
+
+class ReplicaRouter:
+    """
+    Spreads read-only queries over replicas.
+
+    Each query goes to the healthy replica with the fewest outstanding
+    requests. A background thread re-checks every replica every
+    ``check_interval`` seconds; replicas that fail the check or lag the
+    primary by more than ``max_lag`` seconds get no traffic until a later
+    check passes. ``acquire()`` returns None when no replica is usable and
+    the caller falls back to the primary.
+    """
+
+    def __init__(self, dsns, max_lag=5.0, check_interval=5.0):
+        self.replicas = [Replica(dsn, f"replica{i}") for i, dsn in enumerate(dsns)]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._next = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Check every replica once, then keep checking in the background"""
+        self.check_all()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.check_interval):
+            self.check_all()
+
+    def check_all(self):
+        for replica in self.replicas:
+            self.check(replica)
+
+    def check(self, replica):
+        """Probe a replica over a fresh connection and update its health and lag"""
+        try:
+            conn = psycopg2.connect(replica.dsn, connect_timeout=max(1, int(self.check_interval)))
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(LAG_QUERY)
+                    lag = float(cursor.fetchone()[0])
+            finally:
+                conn.close()
+        except psycopg2.Error as e:
+            if replica.healthy or replica.lag_seconds is None:
+                logger.warning("Replica %s failed health check: %s", replica.name, str(e).strip())
+            with self._lock:
+                replica.healthy = False
+                replica.last_error = str(e).strip()
+            return
+
+        with self._lock:
+            was_available = replica.available(self.max_lag)
+            replica.healthy = True
+            replica.lag_seconds = lag
+            replica.last_error = None
+            now_available = replica.available(self.max_lag)
+        if was_available != now_available:
+            logger.info(
+                "Replica %s %s | lag=%.1fs", replica.name,
+                "back in rotation" if now_available else "excluded for lag", lag
+            )
+
+    def acquire(self):
+        """Pick the least-loaded usable replica and count the request against it"""
+        with self._lock:
+            candidates = [r for r in self.replicas if r.available(self.max_lag)]
+            if not candidates:
+                return None
+            # Rotate the starting point so ties do not always land on the same replica
+            self._next = (self._next + 1) % len(candidates)
+            rotated = candidates[self._next:] + candidates[:self._next]
+            replica = min(rotated, key=lambda r: r.outstanding)
+            replica.outstanding += 1
+        return replica
+
+    def release(self, replica, failed=False):
+        with self._lock:
+            replica.outstanding -= 1
+            if failed and replica.healthy:
+                logger.warning("Replica %s marked unhealthy after a connection failure", replica.name)
+                replica.healthy = False
+        metrics.counter(
+            "schemasight_replica_queries_total", "Queries served by read replicas",
+            replica=replica.name, outcome="failed" if failed else "ok"
+        ).inc()
+
+    def status(self):
+        with self._lock:
+            return {replica.name: replica.status() for replica in self.replicas}
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_replica_router():
+    """Process-wide router for Config.DB_REPLICA_DSNS, or None when no replicas are configured"""
+    global _router
+    if not Config.DB_REPLICA_DSNS:
+        return None
+    with _router_lock:
+        if _router is None:
+            logger.info("Routing reads to %d replicas", len(Config.DB_REPLICA_DSNS))
+            _router = ReplicaRouter(
+                Config.DB_REPLICA_DSNS,
+                max_lag=Config.DB_REPLICA_MAX_LAG_SECONDS,
+                check_interval=Config.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+            ).start()
+        return _router
@@ -39,12 +39,4 @@ CREATE TABLE orders (
     customer_name_embedding vector(384)
 );
 
-CREATE INDEX idx_employees_department ON employees(department_id);
-CREATE INDEX idx_employees_salary ON employees(salary);
-CREATE INDEX idx_orders_employee ON orders(employee_id);
-CREATE INDEX idx_orders_date ON orders(order_date);
-CREATE INDEX idx_products_price ON products(price);
-
-CREATE INDEX idx_employees_embedding ON employees USING ivfflat (name_embedding vector_cosine_ops) WITH (lists = 100);
-CREATE INDEX idx_products_embedding ON products USING ivfflat (name_embedding vector_cosine_ops) WITH (lists = 100);
-CREATE INDEX idx_orders_embedding ON orders USING ivfflat (customer_name_embedding vector_cosine_ops) WITH (lists = 100);
\ No newline at end of file
+-- Secondary indexes live in indexes.sql and are built after data is loaded
@@ -0,0 +1,62 @@
+import threading
+from database.prepared import prepared_statements
+from logger_config import get_logger
+
+logger = get_logger("schema_registry")
+
+KNOWN_TABLES = ("departments", "employees", "products", "orders")
+
+prepared_statements.register(
+    "existing_tables",
+    """
+    SELECT table_name
+    FROM information_schema.tables
+    WHERE table_name = ANY($1)
+    """,
+    ("text[]",),
+)
+
+
+class SchemaRegistry:
+    """
+    Process-wide cache of tables known to exist.
+
+    Existence is checked once (at startup via ``warm`` or lazily on first use)
+    and cached for the lifetime of the process. Call ``invalidate`` when the
+    schema changes, e.g. after running ``schema.sql``.
+    """
+
+    def __init__(self):
+        self._existing = set()
+        self._lock = threading.Lock()
+
+    def is_known(self, table_name):
+        return table_name in self._existing
+
+    def missing(self, tables):
+        """Return the tables that have not been confirmed to exist yet"""
+        return [table for table in tables if table not in self._existing]
+
+    def mark_present(self, *tables):
+        with self._lock:
+            self._existing.update(tables)
+
+    def invalidate(self, table_name=None):
+        """Forget cached existence for one table, or for all tables"""
+        with self._lock:
+            if table_name is None:
+                self._existing.clear()
+            else:
+                self._existing.discard(table_name)
+        logger.info("Schema registry invalidated | table=%s", table_name or "*")
+
+    def refresh(self, cursor, tables=KNOWN_TABLES):
+        """Look up all given tables in one round trip on an open cursor"""
+        prepared_statements.execute(cursor, "existing_tables", (list(tables),))
+        found = {row[0] if isinstance(row, tuple) else row["table_name"] for row in cursor.fetchall()}
+        self.mark_present(*found)
+        logger.info("Schema registry refreshed | found=%s", sorted(found))
+        return found
+
+
+schema_registry = SchemaRegistry()
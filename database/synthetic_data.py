@@ -0,0 +1,247 @@
+"""
+Synthetic data generator and bulk loader for the schema.sql tables.
+
+Rows are generated deterministically in independent chunks so several
+worker processes can stream them into Postgres with COPY in parallel.
+Secondary indexes (including the ivfflat ones) live in indexes.sql and
+should be built after the load.
+"""
+
+import csv
+import io
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from logger_config import get_logger
+
+logger = get_logger("synthetic_data")
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+    "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+    "Thomas", "Sarah", "Charles", "Karen", "Aarav", "Priya", "Rahul", "Ananya",
+    "Wei", "Mei", "Carlos", "Sofia", "Ahmed", "Fatima", "Yuki", "Hiro",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Wilson", "Anderson", "Thomas", "Taylor",
+    "Moore", "Jackson", "Martin", "Lee", "Sharma", "Patel", "Gupta", "Singh",
+    "Chen", "Wang", "Kim", "Nguyen", "Khan", "Ali", "Tanaka", "Sato",
+]
+DEPARTMENTS = [
+    "Engineering", "Sales", "Marketing", "HR", "Finance", "Operations",
+    "Support", "Legal", "Research", "Design", "Procurement", "Logistics",
+]
+PRODUCT_ADJECTIVES = [
+    "Wireless", "Ergonomic", "Portable", "Smart", "Compact", "Premium", "Ultra",
+    "Mechanical", "Noise-Cancelling", "Rugged", "Slim", "Pro", "Eco", "Gaming",
+]
+PRODUCT_NOUNS = [
+    "Mouse", "Keyboard", "Monitor", "Laptop", "Headphones", "Webcam", "Speaker",
+    "Chair", "Desk", "Tablet", "Charger", "Router", "Microphone", "Hub", "SSD",
+    "Backpack", "Lamp", "Printer", "Stand", "Dock",
+]
+
+TABLE_COLUMNS = {
+    "departments": ("name",),
+    "employees": ("name", "department_id", "email", "salary"),
+    "products": ("name", "price"),
+    "orders": ("customer_name", "employee_id", "order_total", "order_date"),
+}
+
+# Load order respects foreign keys: employees need departments, orders need employees
+LOAD_ORDER = ("departments", "employees", "products", "orders")
+
+
+class SyntheticDataGenerator:
+    """
+    Deterministic row generator for departments, employees, products and orders.
+
+    ``scale`` multiplies the base row counts (scale=1 gives 1k employees,
+    500 products and 10k orders; scale=100 gives 1M orders). Customer names
+    on orders follow a power law controlled by ``customer_skew`` so a few
+    customers account for most orders, as in production.
+    """
+
+    BASE_EMPLOYEES = 1000
+    BASE_PRODUCTS = 500
+    BASE_ORDERS = 10000
+
+    def __init__(self, scale=1.0, seed=42, customer_skew=3.0):
+        self.scale = scale
+        self.seed = seed
+        self.customer_skew = customer_skew
+        self.employee_count = max(1, int(self.BASE_EMPLOYEES * scale))
+        self.product_count = max(1, int(self.BASE_PRODUCTS * scale))
+        self.order_count = max(1, int(self.BASE_ORDERS * scale))
+        self.customer_pool = max(100, self.order_count // 20)
+        self._order_start = date.today() - timedelta(days=730)
+
+    def row_count(self, table):
+        return {
+            "departments": len(DEPARTMENTS),
+            "employees": self.employee_count,
+            "products": self.product_count,
+            "orders": self.order_count,
+        }[table]
+
+    def _rng(self, table, chunk_start):
+        return random.Random(f"{self.seed}:{table}:{chunk_start}")
+
+    @staticmethod
+    def _name_from_index(i):
+        """Distinct person name for every index"""
+        first = FIRST_NAMES[i % len(FIRST_NAMES)]
+        last = LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]
+        generation = i // (len(FIRST_NAMES) * len(LAST_NAMES))
+        if generation:
+            return f"{first} {chr(65 + generation % 26)}. {last}"
+        return f"{first} {last}"
+
+    def rows(self, table, start=0, stop=None):
+        """Rows ``start``..``stop`` of a table, deterministic for a given seed and chunk start"""
+        stop = self.row_count(table) if stop is None else stop
+        return getattr(self, f"_{table}")(start, stop)
+
+    def _departments(self, start, stop):
+        for name in DEPARTMENTS[start:stop]:
+            yield (name,)
+
+    def _employees(self, start, stop):
+        rng = self._rng("employees", start)
+        for i in range(start, stop):
+            name = self._name_from_index(rng.randrange(len(FIRST_NAMES) * len(LAST_NAMES) * 4))
+            email = f"{name.lower().replace(' ', '.').replace('..', '.')}.{i + 1}@company.com"
+            salary = round(rng.lognormvariate(11.1, 0.35), 2)
+            yield (name, rng.randint(1, len(DEPARTMENTS)), email, salary)
+
+    def _products(self, start, stop):
+        rng = self._rng("products", start)
+        for _ in range(start, stop):
+            name = f"{rng.choice(PRODUCT_ADJECTIVES)} {rng.choice(PRODUCT_NOUNS)} {rng.randint(1, 999)}"
+            yield (name, round(rng.lognormvariate(4.5, 1.0), 2))
+
+    def _orders(self, start, stop):
+        rng = self._rng("orders", start)
+        for _ in range(start, stop):
+            # u ** skew concentrates picks on the low indexes: a few heavy customers
+            customer = int(self.customer_pool * rng.random() ** self.customer_skew)
+            yield (
+                self._name_from_index(customer),
+                rng.randint(1, self.employee_count),
+                round(rng.lognormvariate(5.5, 1.1), 2),
+                self._order_start + timedelta(days=rng.randint(0, 730)),
+            )
+
+
+class _CsvRowStream:
+    """File-like object that renders rows to CSV lazily for cursor.copy_expert"""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.count = 0
+
+    def read(self, size=65536):
+        size = size if size and size > 0 else 65536
+        while len(self._pending) < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.count += 1
+            if self._buffer.tell() >= size:
+                self._pending += self._buffer.getvalue()
+                self._buffer.seek(0)
+                self._buffer.truncate()
+        if len(self._pending) < size:
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+
+def _copy_chunk(table, start, stop, scale, seed, customer_skew):
+    """Worker: COPY one slice of a table over its own connection"""
+    import psycopg2
+    from config import Config
+
+    generator = SyntheticDataGenerator(scale=scale, seed=seed, customer_skew=customer_skew)
+    stream = _CsvRowStream(generator.rows(table, start, stop))
+    conn = psycopg2.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        database=Config.DB_NAME,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD
+    )
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET synchronous_commit = off")
+            cursor.copy_expert(
+                f"COPY {table} ({', '.join(TABLE_COLUMNS[table])}) FROM STDIN WITH (FORMAT csv)",
+                stream
+            )
+        conn.commit()
+    finally:
+        conn.close()
+    return stream.count
+
+
+class SyntheticDataLoader:
+    """Loads generated rows with COPY using several parallel streams per table"""
+
+    def __init__(self, db, generator, streams=None, chunk_rows=100000):
+        self.db = db
+        self.generator = generator
+        self.streams = streams or min(8, os.cpu_count() or 1)
+        self.chunk_rows = chunk_rows
+
+    def _chunks(self, table):
+        total = self.generator.row_count(table)
+        per_chunk = max(1, min(self.chunk_rows, -(-total // self.streams)))
+        return [(start, min(start + per_chunk, total)) for start in range(0, total, per_chunk)]
+
+    def load(self):
+        """Truncate and reload every table; returns per-table row counts and rows/sec"""
+        with self.db.get_maintenance_cursor() as cursor:
+            cursor.execute("TRUNCATE orders, employees, products, departments RESTART IDENTITY CASCADE")
+
+        report = {}
+        with ProcessPoolExecutor(max_workers=self.streams) as pool:
+            for table in LOAD_ORDER:
+                start = time.perf_counter()
+                futures = [
+                    pool.submit(
+                        _copy_chunk, table, chunk_start, chunk_stop,
+                        self.generator.scale, self.generator.seed, self.generator.customer_skew
+                    )
+                    for chunk_start, chunk_stop in self._chunks(table)
+                ]
+                rows = sum(future.result() for future in futures)
+                elapsed = time.perf_counter() - start
+                report[table] = {"rows": rows, "seconds": elapsed, "rows_per_second": rows / elapsed}
+                logger.info(
+                    "Loaded %s: %d rows in %.2fs (%.0f rows/s, %d streams)",
+                    table, rows, elapsed, rows / elapsed, len(futures)
+                )
+
+        with self.db.get_maintenance_cursor() as cursor:
+            cursor.execute("ANALYZE")
+        return report
+
+
+def print_load_report(report):
+    total_rows = sum(entry["rows"] for entry in report.values() if "rows" in entry)
+    total_seconds = sum(entry["seconds"] for entry in report.values())
+    print(f"{'table':<14}{'rows':>12}{'seconds':>10}{'rows/s':>12}")
+    for table, entry in report.items():
+        rows = entry.get("rows", "")
+        rate = f"{entry['rows_per_second']:>12.0f}" if "rows_per_second" in entry else f"{'':>12}"
+        print(f"{table:<14}{rows:>12}{entry['seconds']:>10.2f}{rate}")
+    print(f"{'total':<14}{total_rows:>12}{total_seconds:>10.2f}{total_rows / total_seconds:>12.0f}")
@@ -1,31 +1,253 @@
+import atexit
+import contextvars
+import json
 import logging
+import logging.handlers
+import os
+import queue
 import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
 
 COLORS = {
-    "DEBUG": "\033[94m",    
-    "INFO": "\033[92m",     
-    "WARNING": "\033[93m", 
-    "ERROR": "\033[91m",    
-    "CRITICAL": "\033[95m", 
-    "RESET": "\033[0m"      
+    "DEBUG": "\033[94m",
+    "INFO": "\033[92m",
+    "WARNING": "\033[93m",
+    "ERROR": "\033[91m",
+    "CRITICAL": "\033[95m",
+    "RESET": "\033[0m"
 }
 
+# Logging mode, read from the environment directly because config imports this module
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()           # text | json
+LOG_ASYNC = os.getenv("LOG_ASYNC", "false").lower() == "true"  # hand records to a background thread
+# Per-logger sampling of INFO/DEBUG records, e.g. "database=0.1,search_service=0.5"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+
+_correlation_id = contextvars.ContextVar("correlation_id", default="-")
+
+
 class ColoredFormatter(logging.Formatter):
     """Custom logging formatter with colors based on log level"""
-    
+
     def format(self, record):
         color = COLORS.get(record.levelname, COLORS["RESET"])
         message = super().format(record)
         return f"{color}{message}{COLORS['RESET']}"
 
+
+class JsonFormatter(logging.Formatter):
+    """Compact one-line JSON records"""
+
+    def __init__(self):
+        super().__init__()
+        self._cached_second = None
+        self._cached_prefix = ""
+
+    def _timestamp(self, record):
+        # strftime is the most expensive part of formatting; reuse it within a second
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_second = second
+            self._cached_prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second))
+        return f"{self._cached_prefix}.{int(record.msecs):03d}"
+
+    def format(self, record):
+        payload = {
+            "ts": self._timestamp(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "cid": getattr(record, "correlation_id", "-"),
+        }
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, separators=(",", ":"), default=str)
+
+
+class CorrelationIdFilter(logging.Filter):
+    """Stamps each record with the current request's correlation id"""
+
+    def filter(self, record):
+        record.correlation_id = _correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps roughly ``rate`` of INFO/DEBUG records; warnings and errors always pass"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._count = 0
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        if not self.every:
+            return False
+        self._count += 1
+        return (self._count - 1) % self.every == 0
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that only merges args on the caller thread; formatting happens on the listener"""
+
+    def prepare(self, record):
+        # The record is not shared with other handlers, so it is updated in place
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def new_correlation_id():
+    return uuid.uuid4().hex[:12]
+
+
+def get_correlation_id():
+    return _correlation_id.get()
+
+
+@contextmanager
+def correlation_scope(correlation_id=None):
+    """Tag every record logged inside the block with one correlation id"""
+    token = _correlation_id.set(correlation_id or new_correlation_id())
+    try:
+        yield _correlation_id.get()
+    finally:
+        _correlation_id.reset(token)
+
+
+def _sample_rates():
+    rates = {}
+    for item in filter(None, (part.strip() for part in LOG_SAMPLE_RATES.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def _build_formatter(stream):
+    if LOG_FORMAT == "json":
+        return JsonFormatter()
+    fmt = "%(asctime)s | %(name)s | %(levelname)s | %(message)s"
+    if getattr(stream, "isatty", lambda: False)():
+        return ColoredFormatter(fmt=fmt, datefmt="%Y-%m-%d %H:%M:%S")
+    return logging.Formatter(fmt=fmt, datefmt="%Y-%m-%d %H:%M:%S")
+
+
+class BatchingQueueListener:
+    """
+    Background writer for queued records.
+
+    Instead of waking up for every record (as logging.handlers.QueueListener
+    does), it drains the queue every ``flush_interval`` seconds and writes the
+    batch with a single call, so the logging threads rarely contend for the GIL.
+    """
+
+    def __init__(self, log_queue, handler, flush_interval=0.05):
+        self.queue = log_queue
+        self.handler = handler
+        self.flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _drain(self):
+        lines = []
+        while True:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if record.levelno >= self.handler.level:
+                try:
+                    lines.append(self.handler.format(record))
+                except Exception:
+                    self.handler.handleError(record)
+        if lines:
+            stream = self.handler.stream
+            stream.write("\n".join(lines) + "\n")
+            stream.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self._drain()
+        self._drain()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+_listener = None
+_log_queue = None
+_listener_lock = threading.Lock()
+
+
+def _get_log_queue():
+    """Start the process-wide background listener on first use"""
+    global _listener, _log_queue
+    with _listener_lock:
+        if _listener is None:
+            _log_queue = queue.SimpleQueue()
+            output = logging.StreamHandler(sys.stdout)
+            output.setFormatter(_build_formatter(sys.stdout))
+            _listener = BatchingQueueListener(_log_queue, output)
+            _listener.start()
+            atexit.register(stop_logging)
+        return _log_queue
+
+
+def _skip_caller_lookup(stack_info=False, stacklevel=1):
+    """findCaller for our loggers: none of our formats print file, line or function"""
+    return "(unknown file)", 0, "(unknown function)", None
+
+
+def _restart_listener_in_child():
+    """A forked process inherits the queue but not the listener thread"""
+    global _listener, _listener_lock
+    _listener_lock = threading.Lock()
+    if _listener is not None:
+        # Records queued before the fork are written by the parent; drop the copies
+        while True:
+            try:
+                _log_queue.get_nowait()
+            except queue.Empty:
+                break
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(_build_formatter(sys.stdout))
+        _listener = BatchingQueueListener(_log_queue, output)
+        _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def stop_logging():
+    """Flush and stop the background listener (no-op in synchronous mode)"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
 def get_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     """
-    Returns a configured logger with colored console output.
-    
+    Returns a configured logger.
+
+    Output is coloured text on a TTY, plain text otherwise, or JSON when
+    LOG_FORMAT=json. With LOG_ASYNC=true records are handed to a queue and
+    written by a background thread.
+
     Args:
         name (str): Logger name
         level (int): Logging level (default: INFO)
-        
+
     Returns:
         logging.Logger: Configured logger instance
     """
@@ -33,14 +255,20 @@ def get_logger(name: str, level: int = logging.INFO) -> logging.Logger:
     logger.setLevel(level)
 
     if not logger.handlers:
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(level)
-
-        formatter = ColoredFormatter(
-            fmt="%(asctime)s | %(name)s | %(levelname)s | %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        if LOG_ASYNC:
+            handler = _DeferredQueueHandler(_get_log_queue())
+            # Skips the stack walk for this logger only; other libraries' records are untouched
+            logger.findCaller = _skip_caller_lookup
+        else:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(_build_formatter(sys.stdout))
+        handler.setLevel(level)
+
+        rate = _sample_rates().get(name)
+        if rate is not None and rate < 1:
+            handler.addFilter(SamplingFilter(rate))
+        handler.addFilter(CorrelationIdFilter())
+
+        logger.addHandler(handler)
 
     return logger
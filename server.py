@@ -0,0 +1,351 @@
+"""Headless JSON HTTP server for SearchService (pre-forked worker processes)"""
+
+import argparse
+import json
+import os
+import queue
+import selectors
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from config import Config
+from database.replicas import get_replica_router
+from utils.deadline import Deadline
+from utils.metrics import MultiprocessMetrics, metrics
+from logger_config import get_logger, stop_logging
+
+logger = get_logger("server")
+
+ENDPOINTS = {
+    "/search": "search",
+    "/hybrid": "hybrid_search",
+    "/semantic": "semantic_search",
+}
+
+
+class SearchRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: POST {"query": "...", "timeout": seconds} to /search, /hybrid or /semantic"""
+
+    server_version = "SchemaSight"
+    # Seconds a client may take to send its request before the connection is dropped
+    timeout = 10
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/health":
+            health = {"status": "draining" if self.server.draining else "ok", "pid": os.getpid()}
+            router = get_replica_router()
+            if router is not None:
+                health["replicas"] = router.status()
+            self._send_json(200, health)
+        elif path == "/metrics":
+            # Totals across all workers when they share a metrics directory
+            body = (self.server.shared_metrics or metrics).render_prometheus().encode("utf-8")
+            self._send(200, body, "text/plain; version=0.0.4; charset=utf-8")
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint: {path}"})
+
+    def do_POST(self):
+        method = ENDPOINTS.get(self.path.split("?")[0])
+        if method is None:
+            self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            user_query = payload["query"]
+            if not isinstance(user_query, str) or not user_query.strip():
+                raise ValueError("query must be a non-empty string")
+            timeout = float(payload.get("timeout") or Config.SEARCH_TIMEOUT_SECONDS)
+        except (KeyError, ValueError, TypeError) as e:
+            self._send_json(400, {"error": f"Bad request: {str(e)}"})
+            return
+
+        # Time spent waiting in the queue counts against the request's budget
+        waited = time.monotonic() - self.server.current_enqueued_at()
+        deadline = Deadline(max(0.0, min(timeout, Config.SEARCH_TIMEOUT_SECONDS) - waited))
+        if deadline.expired():
+            self._send_json(503, {"error": "Request expired while queued"}, retry_after=1)
+            return
+
+        result = getattr(self.server.search_service, method)(user_query, deadline=deadline)
+        self._send_json(200, result)
+
+    def _send_json(self, status, payload, retry_after=None):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self._send(status, body, "application/json", retry_after)
+
+    def _send(self, status, body, content_type, retry_after=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if retry_after is not None:
+            self.send_header("Retry-After", str(retry_after))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - " + format, self.client_address[0], *args)
+
+
+class _Rejecter:
+    """
+    Answers connections with a fixed response off the accept thread.
+
+    The response is sent right away and the socket half-closed; it is kept
+    open until the client hangs up (or ``linger`` seconds pass), so unread
+    request bytes do not turn the close into a reset before the client has
+    read the response.
+    """
+
+    def __init__(self, response, linger=1.0):
+        self.response = response
+        self.linger = linger
+        self._incoming = queue.SimpleQueue()
+        self._selector = selectors.DefaultSelector()
+        self._lingering = {}
+        threading.Thread(target=self._run, name="http-rejecter", daemon=True).start()
+
+    def reject(self, sock):
+        self._incoming.put(sock)
+
+    def _answer(self, sock):
+        try:
+            sock.setblocking(False)
+            # A fresh connection's send buffer always has room for the small response
+            sock.send(self.response)
+            sock.shutdown(socket.SHUT_WR)
+            self._selector.register(sock, selectors.EVENT_READ)
+            self._lingering[sock] = time.monotonic() + self.linger
+        except OSError:
+            sock.close()
+
+    def _close(self, sock):
+        self._selector.unregister(sock)
+        del self._lingering[sock]
+        sock.close()
+
+    def _run(self):
+        while True:
+            if not self._lingering:
+                self._answer(self._incoming.get())
+            while True:
+                try:
+                    self._answer(self._incoming.get_nowait())
+                except queue.Empty:
+                    break
+            for key, _ in self._selector.select(timeout=0.01):
+                try:
+                    if key.fileobj.recv(65536):
+                        continue
+                except BlockingIOError:
+                    continue
+                except OSError:
+                    pass
+                self._close(key.fileobj)
+            now = time.monotonic()
+            for sock in [sock for sock, give_up_at in self._lingering.items() if give_up_at <= now]:
+                self._close(sock)
+
+
+OVERLOADED_BODY = b'{"error": "Server overloaded, retry later"}'
+OVERLOADED_RESPONSE = (
+    b"HTTP/1.0 429 Too Many Requests\r\n"
+    b"Content-Type: application/json\r\n"
+    b"Retry-After: 1\r\n"
+    b"Content-Length: " + str(len(OVERLOADED_BODY)).encode() + b"\r\n\r\n" + OVERLOADED_BODY
+)
+
+
+class BoundedHTTPServer(HTTPServer):
+    """
+    HTTPServer on an inherited listening socket with a fixed pool of handler
+    threads fed by a bounded queue.
+
+    Connections accepted while the queue is full are answered with 429 right
+    away instead of piling up, which is the backpressure signal for the gateway.
+    """
+
+    def __init__(self, sock, search_service, threads, queue_size, shared_metrics=None):
+        super().__init__(sock.getsockname()[:2], SearchRequestHandler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.server_name, self.server_port = sock.getsockname()[:2]
+        self.search_service = search_service
+        self.shared_metrics = shared_metrics
+        self.draining = False
+        self._rejecter = _Rejecter(OVERLOADED_RESPONSE)
+        self._pending = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"http-worker-{i}", daemon=True)
+            for i in range(threads)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def get_request(self):
+        conn, address = self.socket.accept()
+        # The listening socket is non-blocking so several processes can share it
+        conn.setblocking(True)
+        return conn, address
+
+    def process_request(self, request, client_address):
+        try:
+            self._pending.put_nowait((request, client_address, time.monotonic()))
+        except queue.Full:
+            metrics.counter("schemasight_http_rejected_total", "Requests rejected with 429").inc()
+            self._rejecter.reject(request)
+
+    def current_enqueued_at(self):
+        return self._local.enqueued_at
+
+    def _work(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            request, client_address, self._local.enqueued_at = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def drain(self, timeout):
+        """Finish queued and in-flight requests, waiting at most ``timeout`` seconds"""
+        for _ in self._threads:
+            self._pending.put(None)
+        give_up_at = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0.0, give_up_at - time.monotonic()))
+        return not any(thread.is_alive() for thread in self._threads)
+
+
+def _run_worker(sock, threads, queue_size, shutdown_timeout, service_factory, metrics_dir):
+    """Body of one pre-forked worker process"""
+    from services.model_registry import model_registry
+
+    search_service = service_factory()
+    # Every thread in this process shares the one embedding model loaded here
+    if Config.WARM_UP_MODELS:
+        model_registry.warm_up()
+    shared_metrics = MultiprocessMetrics(metrics_dir).start()
+    server = BoundedHTTPServer(sock, search_service, threads, queue_size, shared_metrics)
+
+    def request_shutdown(signum, frame):
+        server.draining = True
+        # shutdown() blocks until serve_forever returns, so it needs its own thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+    logger.info("Worker %d serving | threads=%d | queue=%d", os.getpid(), threads, queue_size)
+    server.serve_forever()
+
+    drained = server.drain(shutdown_timeout)
+    logger.info("Worker %d stopped | drained=%s", os.getpid(), drained)
+    shared_metrics.stop()
+    server.socket.close()
+    stop_logging()
+
+
+def _listen(host, port, backlog):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.setblocking(False)
+    return sock
+
+
+def _default_service():
+    from services.search_service import SearchService
+    return SearchService()
+
+
+def serve(host, port, workers, threads, queue_size, shutdown_timeout, service_factory=_default_service):
+    """
+    Bind once, fork ``workers`` processes that accept on the shared socket, and
+    supervise them: crashed workers are replaced, SIGTERM/SIGINT drains them all.
+    :param service_factory: builds the SearchService inside each worker, after the fork
+    """
+    sock = _listen(host, port, backlog=workers * queue_size)
+    # Workers publish metric snapshots here so any of them can serve totals on /metrics
+    metrics_dir = tempfile.mkdtemp(prefix="schemasight-metrics-")
+    logger.info("Listening on http://%s:%d | workers=%d", host, port, workers)
+    children = set()
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _run_worker(sock, threads, queue_size, shutdown_timeout, service_factory, metrics_dir)
+            except Exception:
+                logger.exception("Worker crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        children.add(pid)
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        logger.info("Shutting down %d workers", len(children))
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            logger.warning("Worker %d exited (status %d), starting a replacement", pid, status)
+            time.sleep(1)
+            spawn()
+
+    sock.close()
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    logger.info("Server stopped")
+    stop_logging()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve SearchService over HTTP")
+    parser.add_argument("--host", default=Config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=Config.SERVER_WORKERS,
+                        help="worker processes, each with its own embedding model and DB pool")
+    parser.add_argument("--threads", type=int, default=Config.SERVER_THREADS,
+                        help="request-handling threads per worker")
+    parser.add_argument("--queue-size", type=int, default=Config.SERVER_QUEUE_SIZE,
+                        help="requests a worker may queue before answering 429")
+    parser.add_argument("--shutdown-timeout", type=float, default=Config.SERVER_SHUTDOWN_TIMEOUT_SECONDS)
+    args = parser.parse_args()
+
+    Config.validate()
+    serve(args.host, args.port, args.workers, args.threads, args.queue_size, args.shutdown_timeout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
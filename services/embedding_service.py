@@ -1,35 +1,181 @@
-from sentence_transformers import SentenceTransformer
-import numpy as np
+import threading
+from collections import OrderedDict
+from config import Config
 from database.connection import DatabaseConnection
+from services.model_registry import model_registry
+from database.prepared import prepared_statements
+from utils.singleflight import SingleFlight
+from utils.metrics import span
 from logger_config import get_logger
 
 logger = get_logger("embedding_service")
 
+prepared_statements.register(
+    "update_employee_embedding",
+    "UPDATE employees SET name_embedding = $1 WHERE id = $2",
+    ("vector", "integer"),
+)
+prepared_statements.register(
+    "update_product_embedding",
+    "UPDATE products SET name_embedding = $1 WHERE id = $2",
+    ("vector", "integer"),
+)
+prepared_statements.register(
+    "update_order_embedding",
+    "UPDATE orders SET customer_name_embedding = $1 WHERE id = $2",
+    ("vector", "integer"),
+)
+prepared_statements.register(
+    "search_similar_products",
+    """
+    SELECT id, name, price,
+           1 - (name_embedding <=> $1) as similarity
+    FROM products
+    WHERE name_embedding IS NOT NULL
+    ORDER BY name_embedding <=> $1
+    LIMIT $2
+    """,
+    ("vector", "integer"),
+)
+prepared_statements.register(
+    "search_similar_employees",
+    """
+    SELECT e.id, e.name, e.email, e.salary, d.name as department,
+           1 - (e.name_embedding <=> $1) as similarity
+    FROM employees e
+    LEFT JOIN departments d ON e.department_id = d.id
+    WHERE e.name_embedding IS NOT NULL
+    ORDER BY e.name_embedding <=> $1
+    LIMIT $2
+    """,
+    ("vector", "integer"),
+)
+prepared_statements.register(
+    "search_similar_orders",
+    """
+    SELECT id, customer_name, order_total, order_date,
+           1 - (customer_name_embedding <=> $1) as similarity
+    FROM orders
+    WHERE customer_name_embedding IS NOT NULL
+    ORDER BY customer_name_embedding <=> $1
+    LIMIT $2
+    """,
+    ("vector", "integer"),
+)
+
+# Lexical lookups: trigram word similarity (pg_trgm) or full-text match on the name
+# columns, both served by the GIN indexes in indexes.sql
+prepared_statements.register(
+    "lexical_search_products",
+    """
+    SELECT id, name, price, word_similarity($1, name) as lexical_score
+    FROM products
+    WHERE $1 <% name
+       OR to_tsvector('simple', name) @@ plainto_tsquery('simple', $1)
+    ORDER BY lexical_score DESC, id
+    LIMIT $2
+    """,
+    ("text", "integer"),
+)
+prepared_statements.register(
+    "lexical_search_employees",
+    """
+    SELECT e.id, e.name, e.email, e.salary, d.name as department,
+           word_similarity($1, e.name) as lexical_score
+    FROM employees e
+    LEFT JOIN departments d ON e.department_id = d.id
+    WHERE $1 <% e.name
+       OR to_tsvector('simple', e.name) @@ plainto_tsquery('simple', $1)
+    ORDER BY lexical_score DESC, e.id
+    LIMIT $2
+    """,
+    ("text", "integer"),
+)
+prepared_statements.register(
+    "lexical_search_orders",
+    """
+    SELECT id, customer_name, order_total, order_date,
+           word_similarity($1, customer_name) as lexical_score
+    FROM orders
+    WHERE $1 <% customer_name
+       OR to_tsvector('simple', customer_name) @@ plainto_tsquery('simple', $1)
+    ORDER BY lexical_score DESC, id
+    LIMIT $2
+    """,
+    ("text", "integer"),
+)
+
+SEARCH_TARGETS = ("products", "employees", "orders")
+
+
 class EmbeddingService:
     """Service for generating and managing vector embeddings"""
 
     def __init__(self):
         logger.info("Initializing EmbeddingService...")
-        self.model = SentenceTransformer('all-MiniLM-L6-v2')
         # openai.api_key = Config.OPENAI_API_KEY
         # self.model = "text-embedding-3-small"
         # self.dimensions = 384
         self.db = DatabaseConnection()
+        self.inflight_embeddings = SingleFlight("generate_embedding")
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
         logger.info("EmbeddingService initialized successfully")
 
+    @property
+    def model(self):
+        """Shared embedding model, loaded on first use"""
+        return model_registry.embedding_model()
+
     def generate_embedding(self, text):
         """Generate embedding for a single text"""
         if not text:
             logger.warning("Empty text received for embedding")
             return None
-        embedding = self.model.encode(text, convert_to_numpy=True)
+        cached = self._cached(text)
+        if cached is not None:
+            return cached
+        return self.inflight_embeddings.do(text, self._encode, text)
+
+    def _encode(self, text):
+        with span("embedding_encode"):
+            embedding = self.model.encode(text, convert_to_numpy=True)
         logger.debug("Generated embedding for text: %s", text[:50])
-        return embedding.tolist()
+        embedding = embedding.tolist()
+        self._store(text, embedding)
+        return embedding
+
+    def _cached(self, text):
+        with self._cache_lock:
+            embedding = self._cache.get(text)
+            if embedding is not None:
+                self._cache.move_to_end(text)
+            return embedding
+
+    def _store(self, text, embedding):
+        with self._cache_lock:
+            self._cache[text] = embedding
+            self._cache.move_to_end(text)
+            while len(self._cache) > Config.EMBEDDING_CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def prime_embeddings(self, texts):
+        """
+        Encode the texts not cached yet in one batch so later generate_embedding
+        calls for them are lookups
+        """
+        missing = [text for text in dict.fromkeys(texts) if text and self._cached(text) is None]
+        if not missing:
+            return 0
+        for text, embedding in zip(missing, self.generate_embeddings_batch(missing)):
+            self._store(text, embedding)
+        return len(missing)
 
     def generate_embeddings_batch(self, texts):
         """Generate embeddings for multiple texts"""
         logger.info("Generating embeddings batch | size=%d", len(texts))
-        embeddings = self.model.encode(texts, convert_to_numpy=True)
+        with span("embedding_encode_batch"):
+            embeddings = self.model.encode(texts, convert_to_numpy=True)
         logger.info("Batch embeddings generated successfully")
         return [emb.tolist() for emb in embeddings]
 
@@ -47,13 +193,8 @@ class EmbeddingService:
         names = [emp['name'] for emp in employees]
         embeddings = self.generate_embeddings_batch(names)
 
-        update_query = """
-            UPDATE employees 
-            SET name_embedding = %s::vector 
-            WHERE id = %s
-        """
         data = [(str(emb), emp['id']) for emb, emp in zip(embeddings, employees)]
-        self.db.execute_many(update_query, data)
+        self.db.execute_prepared_many("update_employee_embedding", data)
         logger.info("✓ Generated %d employee embeddings", len(employees))
 
     def populate_product_embeddings(self):
@@ -70,13 +211,8 @@ class EmbeddingService:
         names = [prod['name'] for prod in products]
         embeddings = self.generate_embeddings_batch(names)
 
-        update_query = """
-            UPDATE products 
-            SET name_embedding = %s::vector 
-            WHERE id = %s
-        """
         data = [(str(emb), prod['id']) for emb, prod in zip(embeddings, products)]
-        self.db.execute_many(update_query, data)
+        self.db.execute_prepared_many("update_product_embedding", data)
         logger.info("✓ Generated %d product embeddings", len(products))
 
     def populate_order_embeddings(self):
@@ -93,13 +229,8 @@ class EmbeddingService:
         names = [order['customer_name'] for order in orders]
         embeddings = self.generate_embeddings_batch(names)
 
-        update_query = """
-            UPDATE orders 
-            SET customer_name_embedding = %s::vector 
-            WHERE id = %s
-        """
         data = [(str(emb), order['id']) for emb, order in zip(embeddings, orders)]
-        self.db.execute_many(update_query, data)
+        self.db.execute_prepared_many("update_order_embedding", data)
         logger.info("✓ Generated %d order embeddings", len(orders))
 
     def populate_all_embeddings(self):
@@ -110,45 +241,68 @@ class EmbeddingService:
         self.populate_order_embeddings()
         logger.info("All embeddings generated successfully")
 
-    def search_similar_products(self, query_text, limit=5):
+    def search_similar_products(self, query_text, limit=5, deadline=None):
         """Search for products similar to query text"""
         logger.info("Searching similar products for query: %s", query_text[:50])
         query_embedding = self.generate_embedding(query_text)
 
-        sql = """
-            SELECT id, name, price, 
-                   1 - (name_embedding <=> %s::vector) as similarity
-            FROM products
-            WHERE name_embedding IS NOT NULL
-            ORDER BY name_embedding <=> %s::vector
-            LIMIT %s
-        """
-
-        results = self.db.execute_query(
-            sql, 
-            (str(query_embedding), str(query_embedding), limit)
-        )
+        with span("db_vector_search"):
+            results = self.db.execute_prepared(
+                "search_similar_products",
+                (str(query_embedding), limit),
+                deadline=deadline,
+                replica=True
+            )
         logger.info("Found %d similar products", len(results))
         return results
 
-    def search_similar_employees(self, query_text, limit=5):
+    def search_similar_employees(self, query_text, limit=5, deadline=None):
         """Search for employees similar to query text"""
         logger.info("Searching similar employees for query: %s", query_text[:50])
         query_embedding = self.generate_embedding(query_text)
 
-        sql = """
-            SELECT e.id, e.name, e.email, e.salary, d.name as department,
-                   1 - (e.name_embedding <=> %s::vector) as similarity
-            FROM employees e
-            LEFT JOIN departments d ON e.department_id = d.id
-            WHERE e.name_embedding IS NOT NULL
-            ORDER BY e.name_embedding <=> %s::vector
-            LIMIT %s
-        """
-
-        results = self.db.execute_query(
-            sql, 
-            (str(query_embedding), str(query_embedding), limit)
-        )
+        with span("db_vector_search"):
+            results = self.db.execute_prepared(
+                "search_similar_employees",
+                (str(query_embedding), limit),
+                deadline=deadline,
+                replica=True
+            )
         logger.info("Found %d similar employees", len(results))
         return results
+
+    def search_similar_orders(self, query_text, limit=5, deadline=None):
+        """Search for orders whose customer name is similar to query text"""
+        logger.info("Searching similar orders for query: %s", query_text[:50])
+        query_embedding = self.generate_embedding(query_text)
+
+        with span("db_vector_search"):
+            results = self.db.execute_prepared(
+                "search_similar_orders",
+                (str(query_embedding), limit),
+                deadline=deadline,
+                replica=True
+            )
+        logger.info("Found %d similar orders", len(results))
+        return results
+
+    def vector_search(self, target, query_text, limit=5, deadline=None):
+        """Embedding similarity search on one of SEARCH_TARGETS"""
+        if target not in SEARCH_TARGETS:
+            raise ValueError(f"Unknown search target: {target}")
+        return getattr(self, f"search_similar_{target}")(query_text, limit=limit, deadline=deadline)
+
+    def lexical_search(self, target, term, limit=5, deadline=None):
+        """
+        Name lookup on one of SEARCH_TARGETS without computing an embedding
+        Rows carry a lexical_score between 0 and 1 (1 = the term appears as a whole word).
+        """
+        if target not in SEARCH_TARGETS:
+            raise ValueError(f"Unknown search target: {target}")
+        logger.info("Lexical %s search for term: %s", target, term[:50])
+        with span("db_lexical_search"):
+            results = self.db.execute_prepared(
+                f"lexical_search_{target}", (term, limit), deadline=deadline, replica=True
+            )
+        logger.info("Found %d lexical %s matches", len(results), target)
+        return results
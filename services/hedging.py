@@ -0,0 +1,128 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from services.llm_backends import LLMBackend, LLMCancelled
+from utils.deadline import DeadlineExceeded
+from logger_config import get_logger
+
+logger = get_logger("hedging")
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies used to pick the hedge delay"""
+
+    def __init__(self, window=200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self):
+        return len(self._samples)
+
+    def percentile(self, p):
+        """Latency at percentile ``p`` (0-1), or None when there are no samples"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgedBackend(LLMBackend):
+    """
+    Sends each request to the primary backend and, if it has not answered
+    within the ``hedge_percentile`` of its recent latencies, fires the same
+    request at the backup. Whichever answers first wins; the loser is cancelled.
+    """
+
+    def __init__(self, primary, backup, hedge_percentile=0.95, min_delay=0.05,
+                 default_delay=2.0, min_samples=20, window=200, max_workers=16):
+        super().__init__(f"hedged({primary.name}|{backup.name})")
+        self.primary = primary
+        self.backup = backup
+        self.hedge_percentile = hedge_percentile
+        self.min_delay = min_delay
+        self.default_delay = default_delay
+        self.min_samples = min_samples
+        self.latencies = LatencyTracker(window)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm-hedge")
+        self._stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "hedges": 0, "backup_wins": 0}
+
+    def hedge_delay(self):
+        """How long to wait on the primary before sending the backup request"""
+        if len(self.latencies) < self.min_samples:
+            return self.default_delay
+        return max(self.min_delay, self.latencies.percentile(self.hedge_percentile))
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _timed_primary(self, messages, timeout, cancel_event, kwargs):
+        start = time.monotonic()
+        try:
+            return self.primary.complete(messages, timeout=timeout, cancel_event=cancel_event, **kwargs)
+        finally:
+            # Cancelled or failed calls count too (as a lower bound); recording only
+            # successes would leave out the slow tail and pull the hedge delay down
+            self.latencies.record(time.monotonic() - start)
+
+    def _complete(self, messages, timeout=None, cancel_event=None, **kwargs):
+        self._count("requests")
+        started = time.monotonic()
+
+        def remaining():
+            if timeout is None:
+                return None
+            left = timeout - (time.monotonic() - started)
+            if left <= 0:
+                raise DeadlineExceeded(f"{self.name} timed out after {timeout:.3f}s")
+            return left
+
+        cancels = {}
+        primary_cancel = threading.Event()
+        primary = self._executor.submit(self._timed_primary, messages, remaining(), primary_cancel, kwargs)
+        cancels[primary] = primary_cancel
+
+        delay = self.hedge_delay()
+        if timeout is not None:
+            delay = min(delay, timeout)
+        done, _ = wait([primary], timeout=delay)
+        if primary in done and primary.exception() is None:
+            return primary.result()
+
+        self._count("hedges")
+        logger.debug("Hedging request to %s after %.3fs", self.backup.name, time.monotonic() - started)
+        backup_cancel = threading.Event()
+        backup = self._executor.submit(
+            self.backup.complete, messages, timeout=remaining(), cancel_event=backup_cancel, **kwargs
+        )
+        cancels[backup] = backup_cancel
+
+        pending = {primary, backup}
+        errors = []
+        try:
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise LLMCancelled(f"{self.name} cancelled by caller")
+                done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+                if not done:
+                    raise DeadlineExceeded(f"{self.name} timed out after {timeout:.3f}s")
+                for future in done:
+                    if future.exception() is None:
+                        if future is backup:
+                            self._count("backup_wins")
+                        return future.result()
+                    errors.append(future.exception())
+            raise errors[0]
+        finally:
+            for future, event in cancels.items():
+                if not future.done():
+                    event.set()
+                    future.cancel()
@@ -0,0 +1,325 @@
+import random
+import re
+import threading
+import time
+from config import Config
+from utils.circuit_breaker import CircuitBreaker
+from utils.deadline import DeadlineExceeded
+from logger_config import get_logger
+
+logger = get_logger("llm_backends")
+
+
+class LLMCancelled(Exception):
+    """Raised by a backend that gave up because its caller no longer needs the answer"""
+
+
+class LLMTransientError(Exception):
+    """Provider error worth retrying: rate limited, overloaded or unreachable"""
+
+
+class LLMRateLimited(LLMTransientError):
+    """Provider rejected the request for quota (HTTP 429); it is healthy, just busy"""
+
+
+class LLMBackend:
+    """
+    Interface for chat-completion providers.
+
+    Subclasses implement ``_complete`` and return the message text. ``complete``
+    adds the circuit breaker, when one is configured, in front of it. Calls the
+    caller cut short (cancelled, or timed out on a budget shorter than
+    LLM_TIMEOUT_SECONDS) and rate-limited calls count as neither success nor
+    failure.
+    """
+
+    def __init__(self, name, breaker=None):
+        self.name = name
+        self.breaker = breaker
+
+    def complete(self, messages, timeout=None, cancel_event=None, **kwargs):
+        """
+        Run a chat completion and return the response text
+        :param timeout: seconds to wait before raising DeadlineExceeded
+        :param cancel_event: threading.Event set by the caller to abandon the request
+        """
+        if self.breaker is None:
+            return self._complete(messages, timeout=timeout, cancel_event=cancel_event, **kwargs)
+        self.breaker.before_call()
+        try:
+            text = self._complete(messages, timeout=timeout, cancel_event=cancel_event, **kwargs)
+        except Exception as e:
+            self._record_error(e, timeout, cancel_event)
+            raise
+        self.breaker.record_success()
+        return text
+
+    def stream(self, messages, timeout=None, cancel_event=None, **kwargs):
+        """
+        Run a chat completion, yielding the response text in chunks as it arrives
+        Closing the generator early abandons the rest of the generation; that
+        counts as a success for the circuit breaker.
+        """
+        if self.breaker is None:
+            yield from self._stream(messages, timeout=timeout, cancel_event=cancel_event, **kwargs)
+            return
+        self.breaker.before_call()
+        try:
+            yield from self._stream(messages, timeout=timeout, cancel_event=cancel_event, **kwargs)
+        except GeneratorExit:
+            self.breaker.record_success()
+            raise
+        except Exception as e:
+            self._record_error(e, timeout, cancel_event)
+            raise
+        self.breaker.record_success()
+
+    def _record_error(self, error, timeout, cancel_event):
+        if isinstance(error, (LLMCancelled, LLMRateLimited)) or (cancel_event is not None and cancel_event.is_set()):
+            # Throttling is handled by retries and the rate limiter, not by failing fast
+            self.breaker.record_neutral()
+        elif isinstance(error, DeadlineExceeded) and timeout is not None and timeout < Config.LLM_TIMEOUT_SECONDS:
+            # The caller's shrinking deadline ran out, not the provider's full allowance
+            self.breaker.record_neutral()
+        else:
+            self.breaker.record_failure()
+
+    def _complete(self, messages, timeout=None, cancel_event=None, **kwargs):
+        raise NotImplementedError
+
+    def _stream(self, messages, timeout=None, cancel_event=None, **kwargs):
+        # Backends without native streaming deliver the whole answer as one chunk
+        yield self._complete(messages, timeout=timeout, cancel_event=cancel_event, **kwargs)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name})"
+
+
+class GroqBackend(LLMBackend):
+    """Groq chat completions for a single model"""
+
+    def __init__(self, model, api_key=None, client=None, breaker=None):
+        super().__init__(f"groq:{model}", breaker)
+        if client is None:
+            from groq import Groq
+            # Retries are disabled: the per-request deadline decides how long we may wait
+            client = Groq(
+                api_key=api_key or Config.GROQ_API_KEY,
+                timeout=Config.LLM_TIMEOUT_SECONDS,
+                max_retries=0
+            )
+        self.client = client
+        self.model = model
+
+    def _complete(self, messages, timeout=None, cancel_event=None, **kwargs):
+        # The synchronous client cannot abort an in-flight HTTP request, so a
+        # cancelled call runs to completion and its answer is simply dropped.
+        from groq import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+        try:
+            response = self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                timeout=timeout or Config.LLM_TIMEOUT_SECONDS,
+                **kwargs
+            )
+        except APITimeoutError as e:
+            raise DeadlineExceeded(f"{self.name} timed out: {str(e)}")
+        except RateLimitError as e:
+            raise LLMRateLimited(f"{self.name} rate limited: {str(e)}")
+        except (InternalServerError, APIConnectionError) as e:
+            raise LLMTransientError(f"{self.name} unavailable: {str(e)}")
+        return response.choices[0].message.content
+
+    def _stream(self, messages, timeout=None, cancel_event=None, **kwargs):
+        from groq import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+        try:
+            response = self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                timeout=timeout or Config.LLM_TIMEOUT_SECONDS,
+                stream=True,
+                **kwargs
+            )
+            try:
+                for chunk in response:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise LLMCancelled(f"{self.name} cancelled")
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Drops the HTTP connection when the consumer stops early
+                response.close()
+        except APITimeoutError as e:
+            raise DeadlineExceeded(f"{self.name} timed out: {str(e)}")
+        except RateLimitError as e:
+            raise LLMRateLimited(f"{self.name} rate limited: {str(e)}")
+        except (InternalServerError, APIConnectionError) as e:
+            raise LLMTransientError(f"{self.name} unavailable: {str(e)}")
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any provider exposing the OpenAI chat completions API (OpenAI, vLLM, Together, ...)"""
+
+    def __init__(self, model, api_key=None, base_url=None, breaker=None):
+        super().__init__(f"openai:{model}", breaker)
+        from openai import OpenAI
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url or None,
+            timeout=Config.LLM_TIMEOUT_SECONDS,
+            max_retries=0
+        )
+        self.model = model
+
+    def _complete(self, messages, timeout=None, cancel_event=None, **kwargs):
+        from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+        try:
+            response = self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                timeout=timeout or Config.LLM_TIMEOUT_SECONDS,
+                **kwargs
+            )
+        except APITimeoutError as e:
+            raise DeadlineExceeded(f"{self.name} timed out: {str(e)}")
+        except RateLimitError as e:
+            raise LLMRateLimited(f"{self.name} rate limited: {str(e)}")
+        except (InternalServerError, APIConnectionError) as e:
+            raise LLMTransientError(f"{self.name} unavailable: {str(e)}")
+        return response.choices[0].message.content
+
+    def _stream(self, messages, timeout=None, cancel_event=None, **kwargs):
+        from openai import APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+        try:
+            response = self.client.chat.completions.create(
+                messages=messages,
+                model=self.model,
+                timeout=timeout or Config.LLM_TIMEOUT_SECONDS,
+                stream=True,
+                **kwargs
+            )
+            try:
+                for chunk in response:
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise LLMCancelled(f"{self.name} cancelled")
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # Drops the HTTP connection when the consumer stops early
+                response.close()
+        except APITimeoutError as e:
+            raise DeadlineExceeded(f"{self.name} timed out: {str(e)}")
+        except RateLimitError as e:
+            raise LLMRateLimited(f"{self.name} rate limited: {str(e)}")
+        except (InternalServerError, APIConnectionError) as e:
+            raise LLMTransientError(f"{self.name} unavailable: {str(e)}")
+
+
+class StubBackend(LLMBackend):
+    """
+    Local backend returning canned responses after a simulated latency.
+
+    ``responder`` is either a fixed string or a callable taking the message
+    list. ``latency`` is a callable returning seconds, e.g. from
+    ``StubBackend.lognormal_latency``.
+    """
+
+    def __init__(self, responder, latency=None, name="stub", failure_rate=0.0, seed=None, breaker=None):
+        super().__init__(name, breaker)
+        self.responder = responder
+        self.latency = latency or (lambda: 0.0)
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.calls = 0
+
+    @staticmethod
+    def lognormal_latency(median, sigma=0.5, seed=None):
+        """Latency sampler with a long right tail, typical of LLM endpoints"""
+        rng = random.Random(seed)
+        lock = threading.Lock()
+
+        def sample():
+            with lock:
+                return rng.lognormvariate(0, sigma) * median
+        return sample
+
+    def _complete(self, messages, timeout=None, cancel_event=None, **kwargs):
+        self.calls += 1
+        delay = self.latency()
+        with self._random_lock:
+            fail = self._random.random() < self.failure_rate
+        wait_for = min(delay, timeout) if timeout else delay
+        cancel_event = cancel_event or threading.Event()
+        if cancel_event.wait(wait_for):
+            raise LLMCancelled(f"{self.name} cancelled")
+        if timeout and delay > timeout:
+            raise DeadlineExceeded(f"{self.name} timed out after {timeout:.3f}s")
+        if fail:
+            raise LLMTransientError(f"{self.name} simulated failure")
+        return self._respond(messages)
+
+    def _stream(self, messages, timeout=None, cancel_event=None, **kwargs):
+        # A fifth of the simulated latency passes before the first word-sized
+        # chunk, the rest is spread evenly over the remaining chunks
+        self.calls += 1
+        delay = self.latency()
+        with self._random_lock:
+            fail = self._random.random() < self.failure_rate
+        chunks = re.findall(r"\s*\S+", self._respond(messages)) or [""]
+        cancel_event = cancel_event or threading.Event()
+        started = time.monotonic()
+        for i, chunk in enumerate(chunks):
+            due = delay * (0.2 + 0.8 * i / len(chunks))
+            if timeout and due > timeout:
+                raise DeadlineExceeded(f"{self.name} timed out after {timeout:.3f}s")
+            if cancel_event.wait(max(0.0, due - (time.monotonic() - started))):
+                raise LLMCancelled(f"{self.name} cancelled")
+            if fail:
+                raise LLMTransientError(f"{self.name} simulated failure")
+            yield chunk
+
+    def _respond(self, messages):
+        if callable(self.responder):
+            return self.responder(messages)
+        return self.responder
+
+
+def _breaker_for(name):
+    return CircuitBreaker(
+        name,
+        failure_threshold=Config.LLM_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout=Config.LLM_BREAKER_RESET_SECONDS
+    )
+
+
+def _build_provider(provider, model, api_key=None, base_url=None):
+    if provider == "groq":
+        return GroqBackend(model, api_key=api_key, breaker=_breaker_for(f"groq:{model}"))
+    if provider == "openai":
+        return OpenAICompatibleBackend(
+            model, api_key=api_key, base_url=base_url, breaker=_breaker_for(f"openai:{model}")
+        )
+    raise ValueError(f"Unknown LLM provider: {provider}")
+
+
+def build_llm_backend():
+    """Build the configured backend, hedged against a backup when one is configured"""
+    primary = _build_provider(Config.LLM_PRIMARY_PROVIDER, Config.LLM_PRIMARY_MODEL)
+    if not Config.LLM_BACKUP_PROVIDER:
+        return primary
+
+    from services.hedging import HedgedBackend
+    backup = _build_provider(
+        Config.LLM_BACKUP_PROVIDER,
+        Config.LLM_BACKUP_MODEL,
+        api_key=Config.LLM_BACKUP_API_KEY or None,
+        base_url=Config.LLM_BACKUP_BASE_URL or None
+    )
+    logger.info("LLM hedging enabled | primary=%s | backup=%s", primary.name, backup.name)
+    return HedgedBackend(
+        primary,
+        backup,
+        hedge_percentile=Config.LLM_HEDGE_PERCENTILE,
+        min_delay=Config.LLM_HEDGE_MIN_DELAY_SECONDS
+    )
@@ -0,0 +1,100 @@
+import threading
+import time
+from config import Config
+from logger_config import get_logger
+
+logger = get_logger("model_registry")
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of heavy models and API clients.
+
+    Each entry is built once per process, on first use, and shared by every
+    service that asks for it. Heavy libraries (sentence_transformers/torch,
+    provider SDKs) are only imported inside the loaders.
+    """
+
+    def __init__(self):
+        self._instances = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Return the instance for ``key``, building it with ``loader`` if needed"""
+        instance = self._instances.get(key)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            instance = self._instances.get(key)
+            if instance is None:
+                start = time.perf_counter()
+                instance = loader()
+                self._instances[key] = instance
+                logger.info("Loaded %s in %.2fs", "/".join(map(str, key)), time.perf_counter() - start)
+            return instance
+
+    def is_loaded(self, key):
+        return key in self._instances
+
+    def embedding_model(self, name=None, backend=None):
+        """
+        Model used for all embeddings, exposing SentenceTransformer.encode
+        :param backend: 'torch' (sentence-transformers) or 'onnx'; defaults to Config.EMBEDDING_BACKEND
+        """
+        name = name or Config.EMBEDDING_MODEL
+        backend = backend or Config.EMBEDDING_BACKEND
+
+        if backend == "onnx":
+            def load():
+                from services.onnx_embedding import OnnxSentenceEncoder
+                return OnnxSentenceEncoder(Config.EMBEDDING_ONNX_DIR, quantized=Config.EMBEDDING_ONNX_QUANTIZED)
+
+            variant = "int8" if Config.EMBEDDING_ONNX_QUANTIZED else "fp32"
+            return self.get(("embedding", "onnx", Config.EMBEDDING_ONNX_DIR, variant), load)
+
+        if backend != "torch":
+            raise ValueError(f"Unknown embedding backend: {backend}")
+
+        def load():
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(name)
+
+        return self.get(("embedding", name), load)
+
+    def llm_backend(self):
+        """Configured LLM backend (with its provider clients)"""
+        def load():
+            from services.llm_backends import build_llm_backend
+            return build_llm_backend()
+
+        return self.get(("llm",), load)
+
+    def llm_rate_limiter(self):
+        """Token bucket shared by every LLM call in the process (LLM_RATE_LIMIT_PER_SECOND)"""
+        def load():
+            from utils.rate_limiter import RateLimiter
+            return RateLimiter(Config.LLM_RATE_LIMIT_PER_SECOND, Config.LLM_RATE_LIMIT_BURST)
+
+        return self.get(("llm_rate_limiter",), load)
+
+    def warm_up(self, embedding=True, llm=True):
+        """Load models ahead of the first request; returns seconds spent per component"""
+        timings = {}
+        if embedding:
+            start = time.perf_counter()
+            # A first encode also initialises tokenizer and kernel caches
+            self.embedding_model().encode("warm up", convert_to_numpy=True)
+            timings["embedding"] = time.perf_counter() - start
+        if llm:
+            start = time.perf_counter()
+            self.llm_backend()
+            timings["llm"] = time.perf_counter() - start
+        logger.info("Warm-up complete | %s", {k: round(v, 3) for k, v in timings.items()})
+        return timings
+
+
+model_registry = ModelRegistry()
@@ -0,0 +1,139 @@
+"""
+CPU-optimised embedding backend running an exported ONNX model with ONNX Runtime.
+
+Produces the same 384-dim, L2-normalised mean-pooled vectors as the
+sentence-transformers all-MiniLM-L6-v2 pipeline, optionally from an
+int8 dynamically quantised model.
+
+Export (and quantise) once with:
+    python -m services.onnx_embedding --output models/all-MiniLM-L6-v2-onnx --quantize
+"""
+
+import argparse
+import os
+import numpy as np
+from logger_config import get_logger
+
+logger = get_logger("onnx_embedding")
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+EMBEDDING_DIM = 384
+
+
+class OnnxSentenceEncoder:
+    """Drop-in replacement for SentenceTransformer.encode backed by ONNX Runtime"""
+
+    def __init__(self, model_dir, quantized=False, max_length=256, threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_path = os.path.join(model_dir, INT8_FILE if quantized else FP32_FILE)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX model not found: {model_path}. Export it with "
+                f"'python -m services.onnx_embedding --output {model_dir}{' --quantize' if quantized else ''}'"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.max_length = max_length
+        self.quantized = quantized
+        logger.info("Loaded ONNX embedding model %s", model_path)
+
+    def _encode_batch(self, texts):
+        tokens = self.tokenizer(
+            texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+        )
+        feed = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+        token_embeddings = self.session.run(None, feed)[0]
+
+        mask = tokens["attention_mask"][..., None].astype(token_embeddings.dtype)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def encode(self, sentences, convert_to_numpy=True, batch_size=32, **kwargs):
+        """Same contract as SentenceTransformer.encode for the arguments SchemaSight uses"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+        # Sort by length so each batch pads to a similar size, then restore order
+        order = np.argsort([len(text) for text in texts])
+        chunks = []
+        for start in range(0, len(texts), batch_size):
+            batch_index = order[start:start + batch_size]
+            chunks.append((batch_index, self._encode_batch([texts[i] for i in batch_index])))
+        embeddings = np.empty((len(texts), chunks[0][1].shape[1]), dtype=np.float32)
+        for batch_index, batch in chunks:
+            embeddings[batch_index] = batch
+
+        return embeddings[0] if single else embeddings
+
+
+def export_onnx(model_name, output_dir, opset=14):
+    """Export the sentence-transformers transformer module to ONNX with dynamic batch/sequence axes"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model[0].tokenizer
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    output_path = os.path.join(output_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            output_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(output_dir)
+    logger.info("Exported %s to %s", model_name, output_path)
+    return output_path
+
+
+def quantize_int8(model_dir):
+    """Dynamically quantise the exported model's weights to int8"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    source = os.path.join(model_dir, FP32_FILE)
+    target = os.path.join(model_dir, INT8_FILE)
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+    logger.info("Quantised %s to %s", source, target)
+    return target
+
+
+def main():
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL)
+    parser.add_argument("--output", default=Config.EMBEDDING_ONNX_DIR)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--quantize", action="store_true", help="also write an int8 quantised model")
+    args = parser.parse_args()
+
+    export_onnx(args.model, args.output, args.opset)
+    if args.quantize:
+        quantize_int8(args.output)
+
+
+if __name__ == "__main__":
+    main()
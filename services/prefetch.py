@@ -0,0 +1,252 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from utils.deadline import Deadline
+from utils.metrics import metrics, span
+from logger_config import correlation_scope, get_logger
+
+logger = get_logger("prefetch")
+
+
+def _normalize(query):
+    return " ".join(query.lower().split())
+
+
+class _Entry:
+    def __init__(self, sql_query, result, expires_at):
+        self.sql_query = sql_query
+        self.result = result
+        self.expires_at = expires_at
+        self.used = False
+
+
+class PrefetchCache:
+    """
+    Speculatively computed answers for questions the user has not asked yet.
+
+    An entry holds the validated SQL for a question and, when it was cheap
+    enough to run, the complete search result. Entries expire after ``ttl``
+    seconds so prefetched rows never get too stale.
+    """
+
+    def __init__(self, ttl=300, max_entries=64):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"prefetched": 0, "hits": 0, "sql_hits": 0}
+
+    def put(self, query, sql_query=None, result=None):
+        with self._lock:
+            self._entries[_normalize(query)] = _Entry(sql_query, result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(_normalize(query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._stats["prefetched"] += 1
+
+    def get(self, query):
+        """Live entry for a question, or None"""
+        key = _normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            return entry
+
+    def claim(self, query):
+        """get() for a question the user actually asked; counts the hit once per entry"""
+        entry = self.get(query)
+        if entry is None:
+            return None
+        with self._lock:
+            first_use = not entry.used
+            entry.used = True
+            if first_use:
+                self._stats["hits" if entry.result else "sql_hits"] += 1
+        if first_use:
+            metrics.counter(
+                "schemasight_prefetch_hits_total", "Questions answered from prefetched work",
+                kind="result" if entry.result else "sql"
+            ).inc()
+        return entry
+
+    def sql_for(self, query):
+        entry = self.get(query)
+        return entry.sql_query if entry else None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        used = stats["hits"] + stats["sql_hits"]
+        stats["hit_rate"] = used / stats["prefetched"] if stats["prefetched"] else 0.0
+        return stats
+
+
+class PrefetchRound:
+    """Background prefetch of the follow-ups to one search; ``cancel()`` stops it"""
+
+    def __init__(self, query, budget_seconds, max_llm_calls):
+        self.query = query
+        self.deadline = Deadline(budget_seconds)
+        self.llm_calls_left = max_llm_calls
+        self.suggestions = []
+        self.outcomes = {}
+        self.done = threading.Event()
+        self._suggested = threading.Event()
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self.deadline.expired()
+
+    def cancel(self):
+        if not self.done.is_set():
+            logger.info("Cancelling prefetch for: %s", self.query[:50])
+        self.deadline.cancel()
+
+    def reserve_llm_calls(self, count):
+        """Take ``count`` LLM calls from the round's allowance; False when it is used up"""
+        with self._lock:
+            if self.llm_calls_left < count:
+                return False
+            self.llm_calls_left -= count
+            return True
+
+    @property
+    def suggestions_ready(self):
+        return self._suggested.is_set()
+
+    def wait_for_suggestions(self, timeout=None):
+        """Suggested follow-up questions, once generated (empty list on timeout)"""
+        self._suggested.wait(timeout)
+        return list(self.suggestions)
+
+    def _finish_item(self, suggestion, outcome):
+        with self._lock:
+            self.outcomes[suggestion] = outcome
+            self._pending -= 1
+            if self._pending <= 0:
+                self.done.set()
+
+
+class Prefetcher:
+    """
+    Speculatively answers the related questions suggested after a search.
+
+    Each round asks the LLM for follow-up questions, then generates and
+    validates their SQL and, when the planner's cost estimate is within
+    ``max_query_cost``, runs it and stores the full result in the search
+    service's PrefetchCache. Everything a round does shares one Deadline of
+    ``budget_seconds``, which ``PrefetchRound.cancel()`` spends immediately,
+    and at most ``max_llm_calls`` LLM calls; questions that no longer fit
+    are skipped.
+    """
+
+    def __init__(self, search_service, max_suggestions=None, budget_seconds=None,
+                 max_query_cost=None, max_workers=None, max_llm_calls=None):
+        self.search_service = search_service
+        self.max_suggestions = max_suggestions or Config.PREFETCH_SUGGESTIONS
+        self.budget_seconds = budget_seconds or Config.PREFETCH_BUDGET_SECONDS
+        self.max_llm_calls = max_llm_calls if max_llm_calls is not None else Config.PREFETCH_MAX_LLM_CALLS
+        self.max_query_cost = max_query_cost if max_query_cost is not None else Config.PREFETCH_MAX_QUERY_COST
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.PREFETCH_MAX_WORKERS, thread_name_prefix="prefetch"
+        )
+
+    @property
+    def cache(self):
+        return self.search_service.prefetch_cache
+
+    def start(self, user_query):
+        """Begin prefetching follow-ups to ``user_query`` in the background"""
+        prefetch_round = PrefetchRound(user_query, self.budget_seconds, self.max_llm_calls)
+        self._executor.submit(self._suggest, prefetch_round)
+        return prefetch_round
+
+    def stats(self):
+        return self.cache.stats()
+
+    def _suggest(self, prefetch_round):
+        with correlation_scope():
+            try:
+                if prefetch_round.reserve_llm_calls(1):
+                    suggestions = self.search_service.query_generator.suggest_related_queries(
+                        prefetch_round.query, deadline=prefetch_round.deadline
+                    )
+                    prefetch_round.suggestions = [
+                        s.strip() for s in suggestions if isinstance(s, str) and s.strip()
+                    ][:self.max_suggestions]
+            except Exception as e:
+                logger.warning("Could not get suggestions to prefetch: %s", e)
+            finally:
+                prefetch_round._suggested.set()
+
+        prefetch_round._pending = len(prefetch_round.suggestions)
+        if not prefetch_round.suggestions:
+            prefetch_round.done.set()
+        # Items run on their own workers; this task does not wait for them
+        for suggestion in prefetch_round.suggestions:
+            self._executor.submit(self._prefetch_item, prefetch_round, suggestion)
+
+    def _prefetch_item(self, prefetch_round, suggestion):
+        outcome = "error"
+        with correlation_scope():
+            try:
+                outcome = self._prefetch(suggestion, prefetch_round)
+            except Exception as e:
+                outcome = "cancelled" if prefetch_round.cancelled else "error"
+                logger.info("Prefetch of '%s' stopped: %s", suggestion[:50], e)
+            finally:
+                prefetch_round._finish_item(suggestion, outcome)
+                metrics.counter(
+                    "schemasight_prefetch_total", "Prefetched follow-up questions by outcome",
+                    outcome=outcome
+                ).inc()
+
+    def _prefetch(self, suggestion, prefetch_round):
+        """Prefetch one question; returns the outcome"""
+        deadline = prefetch_round.deadline
+        deadline.check("prefetch")
+        entry = self.cache.get(suggestion)
+        if entry is not None and entry.result is not None:
+            return "cached"
+
+        service = self.search_service
+        with span("prefetch"):
+            if service._is_semantic_query(suggestion):
+                result = service._run_semantic_search(suggestion, deadline)
+                if not result['success']:
+                    return "error"
+                self.cache.put(suggestion, result=result)
+                return "result"
+
+            # SQL generation plus the explanation of its results
+            if not prefetch_round.reserve_llm_calls(2):
+                return "over_budget"
+            sql_query = service.query_generator.generate_sql(suggestion, deadline=deadline)
+            is_valid, error_msg = service.validator.validate_query(sql_query)
+            if not is_valid:
+                logger.info("Prefetched SQL rejected: %s", error_msg)
+                return "invalid"
+
+            cost = service.db.estimate_cost(sql_query, deadline=deadline, replica=True)
+            if cost > self.max_query_cost:
+                logger.info("Prefetch keeps SQL only | cost=%.0f > cap=%.0f", cost, self.max_query_cost)
+                self.cache.put(suggestion, sql_query=sql_query)
+                return "sql"
+
+            rows = service.db.execute_query(sql_query, deadline=deadline, replica=True)
+            explanation = service.query_generator.explain_query(sql_query, deadline=deadline)
+            self.cache.put(suggestion, sql_query=sql_query, result={
+                'success': True,
+                'results': [dict(row) for row in rows],
+                'sql_query': sql_query,
+                'explanation': explanation,
+                'search_type': 'sql',
+                'error': None
+            })
+            return "result"
@@ -1,23 +1,47 @@
-from groq import Groq
 from config import Config
 import json
+import random
+import time
+from services.llm_backends import LLMTransientError
+from services.model_registry import model_registry
+from utils.circuit_breaker import CircuitOpenError
+from utils.deadline import DeadlineExceeded
+from utils.singleflight import SingleFlight
 from logger_config import get_logger
 
 logger = get_logger("query_generator")
 
 
 class QueryGenerator:
-    """Generates SQL queries from natural language using Groq (Llama 3.3)"""
+    """Generates SQL queries from natural language using an LLM backend (Groq Llama 3.3 by default)"""
 
-    def __init__(self):
-        logger.info("Initializing QueryGenerator with Groq...")
-        # Groq uses a client-based approach similar to OpenAI
-        self.client = Groq(api_key=Config.GROQ_API_KEY)
-
-        # Recommended high-performance model
-        self.model = "llama-3.3-70b-versatile"
+    def __init__(self, llm=None, rate_limiter=None):
+        """
+        :param llm: LLMBackend to use; defaults to the process-wide configured
+            provider(s), hedged against a backup when LLM_BACKUP_PROVIDER is set
+        :param rate_limiter: RateLimiter every LLM call waits on; defaults to the
+            process-wide bucket for LLM_RATE_LIMIT_PER_SECOND (none when that is 0)
+        """
+        logger.info("Initializing QueryGenerator...")
+        self._llm = llm
+        if rate_limiter is None and Config.LLM_RATE_LIMIT_PER_SECOND > 0:
+            rate_limiter = model_registry.llm_rate_limiter()
+        self.rate_limiter = rate_limiter
+        self.inflight_sql = SingleFlight("generate_sql")
+        self.inflight_explain = SingleFlight("explain_query")
         self.schema_context = self._build_schema_context()
-        logger.info(f"QueryGenerator initialized with {self.model}")
+        logger.info("QueryGenerator initialized")
+
+    @property
+    def llm(self):
+        """LLM backend, resolved from the model registry on first use"""
+        if self._llm is None:
+            self._llm = model_registry.llm_backend()
+        return self._llm
+
+    @property
+    def model(self):
+        return self.llm.name
 
     def _build_schema_context(self):
         """Build schema context for the LLM (Grounding)"""
@@ -34,10 +58,40 @@ Relationships:
 - orders.employee_id → employees.id
 """
 
-    def generate_sql(self, user_query):
-        """Generate SQL query from natural language using Groq"""
-        logger.info("Generating SQL for user query: %s", user_query[:50])
+    def _complete(self, messages, deadline=None, stage="LLM call", **kwargs):
+        """
+        Chat completion on the LLM backend with a deadline-derived timeout
+        Waits for the rate limiter and retries transient provider errors with
+        jittered exponential backoff while the deadline allows it.
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(timeout=deadline.remaining() if deadline else None)
+            timeout = Config.LLM_TIMEOUT_SECONDS
+            if deadline is not None:
+                timeout = deadline.timeout_for(stage, cap=Config.LLM_TIMEOUT_SECONDS)
+            try:
+                return self.llm.complete(messages, timeout=timeout, **kwargs)
+            except LLMTransientError as e:
+                backoff = Config.LLM_RETRY_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(0.5, 1.5)
+                if attempt >= Config.LLM_MAX_RETRIES or (deadline is not None and deadline.remaining() <= backoff):
+                    raise
+                attempt += 1
+                logger.warning("%s failed (%s), retry %d in %.2fs", stage, e, attempt, backoff)
+                time.sleep(backoff)
+
+    def generate_sql(self, user_query, deadline=None):
+        """
+        Generate SQL query from natural language using the LLM backend
+        Concurrent calls for the same question share one LLM request.
+        """
+        return self.inflight_sql.do(
+            user_query.strip(), self._generate_sql, user_query, deadline,
+            wait_timeout=deadline.remaining() if deadline else None
+        )
 
+    def _sql_messages(self, user_query):
         system_instruction = f"""You are a SQL expert. Convert natural language queries to PostgreSQL SQL queries.
         {self.schema_context}
         Rules:
@@ -47,64 +101,112 @@ Relationships:
         4. Use LIMIT 100 if no limit is specified
         5. Do NOT include a semicolon at the end
         """
+        return [
+            {"role": "system", "content": system_instruction},
+            {"role": "user", "content": user_query}
+        ]
+
+    def _clean_sql(self, sql_query):
+        # Additional cleanup for hallucinations
+        sql_query = sql_query.strip().replace('```sql', '').replace('```', '').strip()
+        if sql_query.endswith(';'):
+            sql_query = sql_query[:-1]
+        return sql_query
+
+    def _generate_sql(self, user_query, deadline=None):
+        logger.info("Generating SQL for user query: %s", user_query[:50])
 
         try:
-            # Groq chat completion call
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_instruction},
-                    {"role": "user", "content": user_query}
-                ],
-                model=self.model,
+            sql_query = self._complete(
+                self._sql_messages(user_query),
+                deadline=deadline,
+                stage="SQL generation",
                 temperature=0  # Keeping it deterministic for SQL
             )
+            sql_query = self._clean_sql(sql_query)
 
-            # Accessing the content from Groq's response object
-            sql_query = chat_completion.choices[0].message.content.strip()
-
-            # Additional cleanup for hallucinations
-            sql_query = sql_query.replace('```sql', '').replace('```', '').strip()
-            if sql_query.endswith(';'):
-                sql_query = sql_query[:-1]
-
-            logger.info("SQL generated successfully by Groq")
+            logger.info("SQL generated successfully by %s", self.model)
             return sql_query
 
+        except (CircuitOpenError, DeadlineExceeded):
+            logger.warning("SQL generation skipped or cut short by circuit breaker/deadline")
+            raise
         except Exception as e:
-            logger.exception("Failed to generate SQL with Groq")
-            raise Exception(f"Groq generation failed: {str(e)}")
+            logger.exception("Failed to generate SQL with %s", self.model)
+            raise Exception(f"LLM generation failed: {str(e)}")
+
+    def stream_sql(self, user_query, deadline=None):
+        """
+        Generate SQL token by token, yielding the cleaned query text so far
+        Closing the generator stops the LLM request; the last value yielded is
+        the complete query.
+        """
+        logger.info("Streaming SQL for user query: %s", user_query[:50])
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(timeout=deadline.remaining() if deadline else None)
+        timeout = Config.LLM_TIMEOUT_SECONDS
+        if deadline is not None:
+            timeout = deadline.timeout_for("SQL generation", cap=Config.LLM_TIMEOUT_SECONDS)
+
+        chunks = self.llm.stream(self._sql_messages(user_query), timeout=timeout, temperature=0)
+        text = ""
+        try:
+            for chunk in chunks:
+                if deadline is not None:
+                    deadline.check("SQL generation")
+                text += chunk
+                yield self._clean_sql(text)
+        finally:
+            chunks.close()
+        logger.info("SQL streamed successfully by %s", self.model)
+
+    def explain_query(self, sql_query, deadline=None):
+        """
+        Get natural language explanation from the LLM backend
+        Concurrent calls for the same SQL share one LLM request.
+        """
+        try:
+            return self.inflight_explain.do(
+                sql_query, self._explain_query, sql_query, deadline,
+                wait_timeout=deadline.remaining() if deadline else None
+            )
+        except DeadlineExceeded as e:
+            # Only reached when waiting on another caller's request; the SQL rows still stand
+            logger.warning("Could not generate explanation: %s", e)
+            return "Could not generate explanation"
 
-    def explain_query(self, sql_query):
-        """Get natural language explanation using Groq"""
+    def _explain_query(self, sql_query, deadline=None):
         logger.info("Generating explanation for SQL query")
         try:
-            response = self.client.chat.completions.create(
-                messages=[
+            explanation = self._complete(
+                [
                     {"role": "system", "content": "Explain SQL queries concisely in one sentence."},
                     {"role": "user", "content": f"Explain this: {sql_query}"}
                 ],
-                model=self.model
+                deadline=deadline,
+                stage="query explanation"
             )
-            return response.choices[0].message.content.strip()
+            return explanation.strip()
         except Exception as e:
             logger.warning("Could not generate explanation: %s", e)
             return "Could not generate explanation"
 
-    def suggest_related_queries(self, user_query):
-        """Suggest 3 related queries using Groq's JSON mode"""
+    def suggest_related_queries(self, user_query, deadline=None):
+        """Suggest 3 related queries using the backend's JSON mode"""
         logger.info("Suggesting related queries")
         prompt = f"""Based on this schema: {self.schema_context}
         Suggest 3 related natural language queries for: "{user_query}"
         Return ONLY a JSON array of strings. Example: ["query 1", "query 2", "query 3"]"""
 
         try:
-            response = self.client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model=self.model,
+            suggestions_text = self._complete(
+                [{"role": "user", "content": prompt}],
+                deadline=deadline,
+                stage="related query suggestion",
                 # Groq can enforce JSON output if specified in the prompt
                 response_format={"type": "json_object"}
             )
-            suggestions_text = response.choices[0].message.content.strip()
+            suggestions_text = suggestions_text.strip()
             # Groq's JSON mode returns an object, we extract our array
             data = json.loads(suggestions_text)
             # If the model wraps it in a key like 'queries', adjust accordingly
@@ -1,28 +1,271 @@
 from database.connection import DatabaseConnection
 from services.embedding_service import EmbeddingService
 from services.query_generator import QueryGenerator
+from services.prefetch import PrefetchCache
 from utils.validators import SQLValidator
-from logger_config import get_logger
+from utils.circuit_breaker import CircuitOpenError
+from utils.deadline import Deadline, DeadlineExceeded
+from utils.singleflight import SingleFlight
+from utils.metrics import metrics, span, start_trace
+from config import Config
+from logger_config import correlation_scope, get_logger
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import psycopg2
 import re
+import time
 
 logger = get_logger("search_service")
 
+# Intent words dropped from a semantic query to find the name being looked up
+LOOKUP_STOPWORDS = {
+    'a', 'all', 'an', 'any', 'are', 'by', 'called', 'customer', 'customers',
+    'employee', 'employees', 'find', 'for', 'from', 'get', 'is', 'like', 'list',
+    'look', 'looking', 'me', 'name', 'named', 'of', 'order', 'orders',
+    'product', 'products', 'related', 'search', 'show', 'similar', 'the',
+    'to', 'type', 'who', 'with'
+}
+
 class SearchService:
     """Orchestrates search operations combining SQL and vector search"""
 
-    def __init__(self):
+    def __init__(self, query_generator=None, embedding_service=None):
         logger.info("Initializing SearchService...")
         self.db = DatabaseConnection()
-        self.embedding_service = EmbeddingService()
-        self.query_generator = QueryGenerator()
+        self.embedding_service = embedding_service or EmbeddingService()
+        self.query_generator = query_generator or QueryGenerator()
         self.validator = SQLValidator()
+        self.inflight_queries = SingleFlight("execute_query")
+        self.prefetch_cache = PrefetchCache(Config.PREFETCH_TTL_SECONDS, Config.PREFETCH_CACHE_SIZE)
+        # Cleared when the database has no pg_trgm (set up before lexical search existed)
+        self.lexical_available = True
         logger.info("SearchService initialized successfully")
 
-    def search(self, user_query):
+    def coalescing_stats(self):
+        """Counters for concurrent identical requests that shared one computation"""
+        return {
+            'generate_sql': self.query_generator.inflight_sql.stats(),
+            'explain_query': self.query_generator.inflight_explain.stats(),
+            'generate_embedding': self.embedding_service.inflight_embeddings.stats(),
+            'execute_query': self.inflight_queries.stats(),
+        }
+
+    def search(self, user_query, deadline=None):
         """
         Main search method that combines SQL generation and vector search
+        :param deadline: optional Deadline for the whole request; defaults to
+            Config.SEARCH_TIMEOUT_SECONDS
+        The result carries per-stage latencies in milliseconds under 'timings'.
+        """
+        with correlation_scope() as request_id, start_trace() as trace:
+            with span("search"):
+                result = self._prefetched(user_query) or self._search(user_query, deadline)
+            return self._finish(result, trace, request_id)
+
+    def search_stream(self, user_query, deadline=None):
+        """
+        Streaming variant of search() that yields progress events:
+        {'event': 'sql', 'sql_query', 'complete'} while the SQL is generated,
+        {'event': 'results', 'results'} once rows are back (before the
+        explanation), and finally {'event': 'done', 'result'} with the same
+        result dict search() returns. A forbidden statement stops the LLM
+        stream as soon as it appears.
+        """
+        with correlation_scope() as request_id, start_trace() as trace:
+            with span("search"):
+                result = self._prefetched(user_query)
+                if result is None:
+                    result = yield from self._search_events(user_query, deadline)
+            yield {'event': 'done', 'result': self._finish(result, trace, request_id)}
+
+    def _search_events(self, user_query, deadline=None):
+        logger.info("Received streaming search query: %s", user_query[:50])
+        deadline = deadline or Deadline(Config.SEARCH_TIMEOUT_SECONDS)
+        with span("route"):
+            is_semantic = self._is_semantic_query(user_query)
+        if is_semantic:
+            return self._semantic_search(user_query, deadline)
+        with span("sql_search"):
+            return (yield from self._stream_sql_search(user_query, deadline))
+
+    def _stream_sql_search(self, user_query, deadline):
+        result = {
+            'success': False,
+            'results': [],
+            'sql_query': None,
+            'explanation': None,
+            'search_type': 'sql',
+            'error': None
+        }
+
+        try:
+            if deadline.remaining() < Config.SQL_PATH_MIN_BUDGET_SECONDS:
+                raise DeadlineExceeded("Not enough budget left for the SQL path")
+
+            sql_query = self.prefetch_cache.sql_for(user_query)
+            if sql_query is None:
+                sql_query = yield from self._stream_sql(user_query, deadline, result)
+                if sql_query is None:
+                    return result
+            result['sql_query'] = sql_query
+            yield {'event': 'sql', 'sql_query': sql_query, 'complete': True}
+
+            with span("validate"):
+                is_valid, error_msg = self.validator.validate_query(sql_query)
+            if not is_valid:
+                result['error'] = f"Invalid query: {error_msg}"
+                logger.warning("SQL validation failed: %s", error_msg)
+                return result
+
+            with span("db_execute"):
+                results = self.inflight_queries.do(
+                    sql_query, self.db.execute_query, sql_query,
+                    deadline=deadline, replica=True, wait_timeout=deadline.remaining()
+                )
+            result['results'] = [dict(row) for row in results]
+            result['success'] = True
+            logger.info("SQL query executed successfully | rows=%d", len(results))
+            yield {'event': 'results', 'results': result['results']}
+
+            with span("llm_explain"):
+                result['explanation'] = self.query_generator.explain_query(sql_query, deadline=deadline)
+
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            return self._degraded_search(user_query, deadline, str(e))
+
+        except Exception as e:
+            logger.exception("Streaming SQL search failed")
+            result['error'] = f"Query execution failed: {str(e)}"
+
+        return result
+
+    def _stream_sql(self, user_query, deadline, result):
+        """Yield partial SQL events; returns the final SQL, or None if the stream was aborted"""
+        sql_query = ""
+        with span("llm_generate"):
+            partials = self.query_generator.stream_sql(user_query, deadline=deadline)
+            try:
+                for sql_query in partials:
+                    is_valid, error_msg = self.validator.validate_partial(sql_query)
+                    if not is_valid:
+                        logger.warning("Aborting SQL stream: %s", error_msg)
+                        metrics.counter(
+                            "schemasight_sql_stream_aborts_total", "SQL streams stopped by early validation"
+                        ).inc()
+                        result['sql_query'] = sql_query
+                        result['error'] = f"Invalid query: {error_msg} (generation stopped early)"
+                        return None
+                    yield {'event': 'sql', 'sql_query': sql_query, 'complete': False}
+            finally:
+                partials.close()
+        return sql_query
+
+    def _prefetched(self, user_query):
+        """Copy of a complete result prefetched for this question, if any"""
+        entry = self.prefetch_cache.claim(user_query)
+        if entry is None or entry.result is None:
+            return None
+        logger.info("Serving prefetched result for: %s", user_query[:50])
+        result = dict(entry.result, results=list(entry.result['results']))
+        result['prefetched'] = True
+        return result
+
+    def _finish(self, result, trace, request_id):
+        """Attach stage timings and the correlation id to the result and count it"""
+        result['timings'] = trace.as_millis()
+        result['request_id'] = request_id
+        metrics.counter(
+            "schemasight_searches_total", "Completed searches by type and outcome",
+            search_type=result['search_type'],
+            status='success' if result['success'] else 'error'
+        ).inc()
+        return result
+
+    def search_many(self, queries, max_workers=None):
+        """
+        Run many searches and return their results in input order
+        Each item is a regular search result; failures are reported in its
+        'error' field instead of aborting the batch.
+        """
+        results = [None] * len(queries)
+        for index, result in self.iter_search_many(queries, max_workers=max_workers):
+            results[index] = result
+        return results
+
+    def iter_search_many(self, queries, max_workers=None):
+        """
+        Run many searches concurrently, yielding (index, result) as each completes
+
+        Identical questions (ignoring surrounding whitespace) are searched once.
+        Questions routed to semantic search are embedded in one batched encode
+        per window, LLM calls go through the query generator's rate limiter and
+        retries, and SQL runs on up to ``max_workers`` pooled connections.
         """
+        positions = {}
+        for index, query in enumerate(queries):
+            positions.setdefault(query.strip(), []).append(index)
+        unique = list(positions)
+        workers = max_workers or Config.BATCH_MAX_CONCURRENCY
+        # Windows stay well inside the embedding cache so primed vectors are not evicted
+        window_size = max(workers, Config.EMBEDDING_CACHE_SIZE // 2)
+        started = time.perf_counter()
+        logger.info(
+            "Batch search started | questions=%d | unique=%d | workers=%d",
+            len(queries), len(unique), workers
+        )
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search-many")
+        try:
+            for offset in range(0, len(unique), window_size):
+                window = unique[offset:offset + window_size]
+                self._prime_embeddings(window)
+                futures = {executor.submit(self._search_item, query): query for query in window}
+                for future in as_completed(futures):
+                    result = future.result()
+                    first, *duplicates = positions[futures[future]]
+                    yield first, result
+                    for index in duplicates:
+                        yield index, dict(result)
+        finally:
+            # Also reached when the caller stops iterating early
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        logger.info(
+            "Batch search finished | questions=%d | seconds=%.2f",
+            len(queries), time.perf_counter() - started
+        )
+
+    def _prime_embeddings(self, queries):
+        """Embed the semantic questions of a batch window in one encode"""
+        if Config.SEMANTIC_SEARCH_MODE == 'lexical':
+            return
+        semantic = [query for query in queries if query and self._is_semantic_query(query)]
+        if not semantic:
+            return
+        try:
+            primed = self.embedding_service.prime_embeddings(semantic)
+            logger.info("Batch-encoded %d semantic questions", primed)
+        except Exception:
+            # Searches still embed their own question if the batch encode fails
+            logger.warning("Batched embedding failed, encoding per question", exc_info=True)
+
+    def _search_item(self, user_query):
+        """One search_many item; never raises"""
+        try:
+            return self.search(user_query)
+        except Exception as e:
+            logger.exception("Batch item failed")
+            return {
+                'success': False,
+                'results': [],
+                'sql_query': None,
+                'explanation': None,
+                'search_type': 'sql',
+                'error': str(e)
+            }
+
+    def _search(self, user_query, deadline=None):
         logger.info("Received search query: %s", user_query[:50])
+        deadline = deadline or Deadline(Config.SEARCH_TIMEOUT_SECONDS)
         result = {
             'success': False,
             'results': [],
@@ -33,15 +276,16 @@ class SearchService:
         }
 
         try:
-            is_semantic = self._is_semantic_query(user_query)
+            with span("route"):
+                is_semantic = self._is_semantic_query(user_query)
             logger.debug("Is semantic query: %s", is_semantic)
 
             if is_semantic:
                 logger.info("Performing semantic search")
-                return self._semantic_search(user_query)
+                return self._semantic_search(user_query, deadline)
             else:
                 logger.info("Performing SQL-based search")
-                return self._sql_search(user_query)
+                return self._sql_search(user_query, deadline)
 
         except Exception as e:
             logger.exception("Search failed")
@@ -59,8 +303,16 @@ class SearchService:
         logger.debug("Semantic query check for '%s': %s", query[:50], is_semantic)
         return is_semantic
 
-    def _sql_search(self, user_query):
-        """Execute search using SQL generation"""
+    def _sql_search(self, user_query, deadline=None, allow_fallback=True):
+        """
+        Execute search using SQL generation
+        Falls back to semantic search when the LLM circuit is open or the SQL
+        path cannot finish within the deadline (unless allow_fallback is False).
+        """
+        with span("sql_search"):
+            return self._run_sql_search(user_query, deadline, allow_fallback)
+
+    def _run_sql_search(self, user_query, deadline=None, allow_fallback=True):
         logger.info("Executing SQL search for query: %s", user_query[:50])
         result = {
             'success': False,
@@ -72,22 +324,40 @@ class SearchService:
         }
 
         try:
-            sql_query = self.query_generator.generate_sql(user_query)
+            if deadline is not None and deadline.remaining() < Config.SQL_PATH_MIN_BUDGET_SECONDS:
+                raise DeadlineExceeded("Not enough budget left for the SQL path")
+
+            sql_query = self.prefetch_cache.sql_for(user_query)
+            if sql_query is None:
+                with span("llm_generate"):
+                    sql_query = self.query_generator.generate_sql(user_query, deadline=deadline)
             result['sql_query'] = sql_query
             logger.debug("Generated SQL: %s", sql_query[:100])
 
-            is_valid, error_msg = self.validator.validate_query(sql_query)
+            with span("validate"):
+                is_valid, error_msg = self.validator.validate_query(sql_query)
             if not is_valid:
                 result['error'] = f"Invalid query: {error_msg}"
                 logger.warning("SQL validation failed: %s", error_msg)
                 return result
 
-            results = self.db.execute_query(sql_query)
+            with span("db_execute"):
+                results = self.inflight_queries.do(
+                    sql_query, self.db.execute_query, sql_query,
+                    deadline=deadline, replica=True, wait_timeout=deadline.remaining() if deadline else None
+                )
             result['results'] = [dict(row) for row in results]
             result['success'] = True
             logger.info("SQL query executed successfully | rows=%d", len(results))
 
-            result['explanation'] = self.query_generator.explain_query(sql_query)
+            with span("llm_explain"):
+                result['explanation'] = self.query_generator.explain_query(sql_query, deadline=deadline)
+
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            if allow_fallback:
+                return self._degraded_search(user_query, deadline, str(e))
+            logger.warning("SQL search aborted: %s", e)
+            result['error'] = f"Query execution failed: {str(e)}"
 
         except Exception as e:
             logger.exception("SQL search failed")
@@ -95,8 +365,30 @@ class SearchService:
 
         return result
 
-    def _semantic_search(self, user_query):
+    def _degraded_search(self, user_query, deadline, reason):
+        """Serve semantic results when the SQL path is unavailable"""
+        logger.warning("SQL path unavailable, falling back to semantic search: %s", reason)
+        result = self._semantic_search(user_query, deadline)
+        result['degraded'] = True
+        result['degraded_reason'] = reason
+        if result['success']:
+            result['explanation'] = f"SQL generation unavailable ({reason}). {result['explanation']}"
+        return result
+
+    def semantic_search(self, user_query, deadline=None):
+        """
+        Semantic (lexical + vector) search only, skipping SQL generation
+        """
+        with correlation_scope() as request_id, start_trace() as trace:
+            result = self._semantic_search(user_query, deadline or Deadline(Config.SEARCH_TIMEOUT_SECONDS))
+            return self._finish(result, trace, request_id)
+
+    def _semantic_search(self, user_query, deadline=None):
         """Execute semantic search using vector embeddings"""
+        with span("semantic_search"):
+            return self._run_semantic_search(user_query, deadline)
+
+    def _run_semantic_search(self, user_query, deadline=None):
         logger.info("Executing semantic search for query: %s", user_query[:50])
         result = {
             'success': False,
@@ -108,16 +400,8 @@ class SearchService:
         }
 
         try:
-            if 'product' in user_query.lower():
-                results = self.embedding_service.search_similar_products(user_query, limit=10)
-                result['explanation'] = "Searching for similar products using AI embeddings"
-            elif 'employee' in user_query.lower():
-                results = self.embedding_service.search_similar_employees(user_query, limit=10)
-                result['explanation'] = "Searching for similar employees using AI embeddings"
-            else:
-                results = self.embedding_service.search_similar_products(user_query, limit=10)
-                result['explanation'] = "Performing semantic search across products"
-
+            target = self._semantic_target(user_query)
+            results, result['explanation'] = self._retrieve(target, user_query, 10, deadline)
             result['results'] = [dict(row) for row in results]
             result['success'] = True
             logger.info("Semantic search completed | results=%d", len(results))
@@ -128,13 +412,102 @@ class SearchService:
 
         return result
 
-    def hybrid_search(self, user_query):
+    def _semantic_target(self, query):
+        """Which table a semantic query is about"""
+        query_lower = query.lower()
+        if 'product' in query_lower:
+            return 'products'
+        if 'employee' in query_lower:
+            return 'employees'
+        if 'customer' in query_lower or 'order' in query_lower:
+            return 'orders'
+        return 'products'
+
+    def _lookup_term(self, query):
+        """The name being looked up: quoted text, or the query minus intent words"""
+        quoted = re.findall(r'"([^"]+)"|\'([^\']+)\'', query)
+        if quoted:
+            return " ".join(part for pair in quoted for part in pair if part)
+        words = [word for word in re.findall(r"[\w\-]+", query.lower()) if word not in LOOKUP_STOPWORDS]
+        return " ".join(words) or query
+
+    def _retrieve(self, target, user_query, limit, deadline=None):
+        """
+        Retrieve rows for a semantic query according to Config.SEMANTIC_SEARCH_MODE
+        In fusion mode a confident lexical hit skips the embedding model entirely.
+        Every row carries similarity, lexical_score (None when not computed) and score.
+        Returns (rows, explanation).
+        """
+        label = target if target != 'orders' else 'customers'
+        mode = Config.SEMANTIC_SEARCH_MODE
+        term = self._lookup_term(user_query)
+        lexical = self._lexical_rows(target, term, limit, deadline) if mode != 'vector' else None
+        if lexical is None:
+            rows = self.embedding_service.vector_search(target, user_query, limit, deadline)
+            return self._fuse([], rows, limit), f"Searching for similar {label} using AI embeddings"
+
+        top_score = lexical[0]['lexical_score'] if lexical else 0.0
+        if mode == 'lexical' or top_score >= Config.LEXICAL_CONFIDENCE_THRESHOLD:
+            logger.info("Lexical match for '%s' (score=%.2f), skipping embeddings", term, top_score)
+            metrics.counter(
+                "schemasight_lexical_shortcuts_total", "Semantic searches answered without embeddings",
+                target=target
+            ).inc()
+            return self._fuse(lexical, [], limit), f"Matched {label} by name for '{term}'"
+
+        vector = self.embedding_service.vector_search(target, user_query, limit, deadline)
+        return self._fuse(lexical, vector, limit), f"Searching for similar {label} using AI embeddings and name matching"
+
+    def _lexical_rows(self, target, term, limit, deadline=None):
+        """Lexical matches, or None when lexical search cannot run and vector search must be used"""
+        if not self.lexical_available:
+            return None
+        try:
+            with span("lexical_search"):
+                return self.embedding_service.lexical_search(target, term, limit, deadline)
+        except DeadlineExceeded:
+            raise
+        except psycopg2.errors.UndefinedFunction:
+            logger.warning("pg_trgm is not installed; semantic search uses embeddings only (re-run setup_database.py)")
+            self.lexical_available = False
+        except Exception as e:
+            logger.warning("Lexical search failed, using embeddings only: %s", e)
+        return None
+
+    def _fuse(self, lexical, vector, limit):
+        """Merge lexical and vector rows by id using a weighted score"""
+        weight = Config.LEXICAL_FUSION_WEIGHT
+        merged = {}
+        for row in vector:
+            merged[row['id']] = dict(row, lexical_score=None)
+        for row in lexical:
+            item = merged.setdefault(row['id'], dict(row, similarity=None))
+            item['lexical_score'] = row['lexical_score']
+        for item in merged.values():
+            lexical_score = float(item['lexical_score'] or 0.0)
+            similarity = float(item['similarity'] or 0.0)
+            if not lexical:
+                item['score'] = similarity
+            elif not vector:
+                item['score'] = lexical_score
+            else:
+                item['score'] = weight * lexical_score + (1 - weight) * similarity
+        return sorted(merged.values(), key=lambda item: item['score'], reverse=True)[:limit]
+
+    def hybrid_search(self, user_query, deadline=None):
         """
         Perform hybrid search combining both SQL and vector search
         """
+        with correlation_scope() as request_id, start_trace() as trace:
+            with span("hybrid_search"):
+                result = self._hybrid_search(user_query, deadline)
+            return self._finish(result, trace, request_id)
+
+    def _hybrid_search(self, user_query, deadline=None):
         logger.info("Performing hybrid search for query: %s", user_query[:50])
-        sql_result = self._sql_search(user_query)
-        semantic_result = self._semantic_search(user_query)
+        deadline = deadline or Deadline(Config.SEARCH_TIMEOUT_SECONDS)
+        sql_result = self._sql_search(user_query, deadline, allow_fallback=False)
+        semantic_result = self._semantic_search(user_query, deadline)
 
         combined_results = []
         seen_ids = set()
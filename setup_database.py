@@ -1,11 +1,15 @@
 """Database setup script Creates database, tables, and populates sample data with embeddings"""
 
+import argparse
 import os
+import time
 import psycopg2
 import sqlparse
 from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 from config import Config
 from database.connection import DatabaseConnection
+from database.schema_registry import schema_registry
+from database.synthetic_data import SyntheticDataGenerator, SyntheticDataLoader, print_load_report
 from services.embedding_service import EmbeddingService
 from logger_config import get_logger
 
@@ -73,12 +77,16 @@ def ensure_pgvector_extension():
     logger.info(f"Postgres data directory: {cursor.fetchone()}")
 
     cursor.execute("CREATE EXTENSION IF NOT EXISTS vector;")
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
 
     cursor.close()
     conn.close()
 
-def run_sql_file(filename):
-    """Execute SQL commands from a file"""
+def run_sql_file(filename, skip=None):
+    """
+    Execute SQL commands from a file
+    :param skip: optional predicate; statements it returns True for are not run
+    """
     db = DatabaseConnection()
     filepath = os.path.join("database", filename)
 
@@ -88,23 +96,61 @@ def run_sql_file(filename):
     with open(filepath, "r", encoding="utf-8") as f:
         sql_content = f.read()
 
-    statements = sqlparse.split(sql_content)
+    statements = [stmt for stmt in sqlparse.split(sql_content) if stmt.strip()]
+    if skip is not None:
+        statements = [stmt for stmt in statements if not skip(stmt)]
+        sql_content = "\n".join(statements)
 
     try:
-        with db.get_cursor(dict_cursor=False) as cursor:
-            for stmt in statements:
-                stmt = stmt.strip()
-                if stmt:
-                    cursor.execute(stmt)
+        # The whole file goes to the server in one round trip
+        with db.get_maintenance_cursor() as cursor:
+            cursor.execute(sql_content)
 
         logger.info("Executed SQL file: %s (%d statements)", filename, len(statements))
+        schema_registry.invalidate()
 
     except Exception:
         logger.exception("Error executing SQL file: %s", filename)
         raise
 
 
+def load_synthetic_data(scale, streams):
+    """Bulk-load generated rows with parallel COPY streams and report rows/sec"""
+    loader = SyntheticDataLoader(DatabaseConnection(), SyntheticDataGenerator(scale=scale), streams=streams)
+    return loader.load()
+
+
+def create_indexes(vector_indexes=True):
+    """
+    Build secondary indexes once the data (and embeddings) are in place
+    :param vector_indexes: False skips the ivfflat indexes, whose lists would be
+        trained on empty embedding columns
+    """
+    start = time.perf_counter()
+    if vector_indexes:
+        run_sql_file("indexes.sql")
+    else:
+        run_sql_file("indexes.sql", skip=lambda stmt: "ivfflat" in stmt.lower())
+        logger.warning(
+            "Skipped ivfflat embedding indexes; run the ivfflat statements in "
+            "database/indexes.sql after populating embeddings"
+        )
+    return time.perf_counter() - start
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Create the SchemaSight database and load data")
+    parser.add_argument(
+        "--synthetic-scale", type=float,
+        help="load generated data at this scale (1 = 10k orders, 100 = 1M orders) instead of seed_data.sql"
+    )
+    parser.add_argument("--streams", type=int, help="parallel COPY streams for synthetic data")
+    parser.add_argument("--skip-embeddings", action="store_true", help="do not generate AI embeddings")
+    return parser.parse_args()
+
+
 def main():
+    args = parse_args()
     logger.info("=" * 50)
     logger.info("DATABASE SETUP STARTED")
     logger.info("=" * 50)
@@ -120,12 +166,25 @@ def main():
         logger.info("Creating database schema...")
         run_sql_file("schema.sql")
 
-        logger.info("Inserting sample data...")
-        run_sql_file("seed_data.sql")
+        load_report = None
+        if args.synthetic_scale:
+            logger.info("Loading synthetic data | scale=%s", args.synthetic_scale)
+            load_report = load_synthetic_data(args.synthetic_scale, args.streams)
+        else:
+            logger.info("Inserting sample data...")
+            run_sql_file("seed_data.sql")
+
+        if not args.skip_embeddings:
+            logger.info("Generating AI embeddings...")
+            embedding_service = EmbeddingService()
+            embedding_service.populate_all_embeddings()
+
+        logger.info("Creating indexes...")
+        index_seconds = create_indexes(vector_indexes=not args.skip_embeddings)
 
-        logger.info("Generating AI embeddings...")
-        embedding_service = EmbeddingService()
-        embedding_service.populate_all_embeddings()
+        if load_report is not None:
+            load_report["indexes"] = {"seconds": index_seconds}
+            print_load_report(load_report)
 
         logger.info("=" * 50)
         logger.info("DATABASE SETUP COMPLETE!")
@@ -0,0 +1,46 @@
+import time
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request runs out of its time budget"""
+
+
+class Deadline:
+    """
+    Time budget for a single request, passed down through each pipeline stage.
+
+    Stages derive their own timeouts from ``remaining()`` so the request as a
+    whole never runs longer than the budget it started with.
+    """
+
+    def __init__(self, timeout_seconds):
+        self.timeout_seconds = timeout_seconds
+        self.expires_at = time.monotonic() + timeout_seconds
+
+    def remaining(self):
+        """Seconds left before the deadline (never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def cancel(self):
+        """Spend the rest of the budget so every later stage stops early"""
+        self.expires_at = time.monotonic()
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self, stage):
+        """Raise DeadlineExceeded if there is no budget left for ``stage``"""
+        if self.expired():
+            raise DeadlineExceeded(f"Deadline exceeded before {stage}")
+
+    def timeout_for(self, stage, cap=None):
+        """
+        Timeout to give a stage: the remaining budget, optionally capped
+        Raises DeadlineExceeded if the budget is already spent.
+        """
+        self.check(stage)
+        remaining = self.remaining()
+        return min(remaining, cap) if cap else remaining
+
+    def __repr__(self):
+        return f"Deadline(remaining={self.remaining():.3f}s of {self.timeout_seconds}s)"
@@ -0,0 +1,35 @@
+import io
+
+
+def iter_csv_chunks(df, chunk_rows=10000):
+    """Yield a DataFrame as encoded CSV, ``chunk_rows`` rows at a time (header in the first chunk)"""
+    for start in range(0, max(len(df), 1), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode("utf-8")
+
+
+def export_csv(df, chunk_rows=10000):
+    buffer = io.BytesIO()
+    for chunk in iter_csv_chunks(df, chunk_rows):
+        buffer.write(chunk)
+    return buffer.getvalue()
+
+
+def export_parquet(df, chunk_rows=10000):
+    """Parquet file with one row group per ``chunk_rows`` rows"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    buffer = io.BytesIO()
+    with pq.ParquetWriter(buffer, schema) as writer:
+        for start in range(0, max(len(df), 1), chunk_rows):
+            writer.write_table(
+                pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema, preserve_index=False)
+            )
+    return buffer.getvalue()
+
+
+EXPORT_FORMATS = {
+    "CSV": (export_csv, "search_results.csv", "text/csv"),
+    "Parquet": (export_parquet, "search_results.parquet", "application/vnd.apache.parquet"),
+}
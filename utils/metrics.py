@@ -0,0 +1,282 @@
+import bisect
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from logger_config import get_logger
+
+logger = get_logger("metrics")
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_current_trace = contextvars.ContextVar("schemasight_trace", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class Histogram:
+    """Cumulative latency histogram for one label set"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if index < len(self.buckets):
+                self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+
+class Counter:
+    """Monotonic counter for one label set"""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class MetricsRegistry:
+    """In-process metrics, rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help_text, labels, factory):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, {"kind": kind, "help": help_text, "series": {}})
+            if family["kind"] != kind:
+                raise ValueError(f"Metric '{name}' already registered as a {family['kind']}")
+            series = family["series"].get(key)
+            if series is None:
+                series = family["series"][key] = factory()
+            return series
+
+    def histogram(self, name, help_text="", **labels):
+        return self._get("histogram", name, help_text, labels, Histogram)
+
+    def counter(self, name, help_text="", **labels):
+        return self._get("counter", name, help_text, labels, Counter)
+
+    def snapshot(self):
+        """Plain-data copy of every series (JSON-serializable), for merging across processes"""
+        with self._lock:
+            families = {name: dict(family, series=dict(family["series"])) for name, family in self._families.items()}
+        result = {}
+        for name, family in families.items():
+            series = []
+            for labels, item in family["series"].items():
+                if family["kind"] == "counter":
+                    value = item.value
+                else:
+                    counts, count, total = item.snapshot()
+                    value = {"buckets": list(item.buckets), "counts": counts, "count": count, "sum": total}
+                series.append([[list(pair) for pair in labels], value])
+            result[name] = {"kind": family["kind"], "help": family["help"], "series": series}
+        return result
+
+    def render_prometheus(self):
+        return render_snapshots([self.snapshot()])
+
+
+def render_snapshots(snapshots):
+    """Prometheus text for the sum of several registry snapshots"""
+    merged = {}
+    for snapshot in snapshots:
+        for name, family in snapshot.items():
+            target = merged.setdefault(name, {"kind": family["kind"], "help": family["help"], "series": {}})
+            for labels, value in family["series"]:
+                key = tuple(tuple(pair) for pair in labels)
+                current = target["series"].get(key)
+                if current is None:
+                    target["series"][key] = value if family["kind"] == "counter" else dict(value, counts=list(value["counts"]))
+                elif family["kind"] == "counter":
+                    target["series"][key] = current + value
+                else:
+                    current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                    current["count"] += value["count"]
+                    current["sum"] += value["sum"]
+
+    lines = []
+    for name, family in sorted(merged.items()):
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+        for labels, value in sorted(family["series"].items()):
+            if family["kind"] == "counter":
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, bucket_count in zip(value["buckets"], value["counts"]):
+                cumulative += bucket_count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value['count']}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+    return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+
+class MultiprocessMetrics:
+    """
+    Shares a process's registry with sibling processes through a directory.
+
+    Each process writes its snapshot to its own file in ``directory`` every
+    ``interval`` seconds and before rendering; ``render_prometheus`` sums all
+    files, so a scrape of any worker reports totals for every worker. Files
+    of exited processes are kept so counters never go backwards.
+    """
+
+    def __init__(self, directory, registry=None, interval=1.0):
+        self.directory = directory
+        self.registry = registry or metrics
+        self.interval = interval
+        # pid alone could be reused by a replacement worker and overwrite a dead one's counts
+        self.path = os.path.join(directory, f"{os.getpid()}-{time.time_ns()}.json")
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+
+    def start(self):
+        self.write()
+        threading.Thread(target=self._run, name="metrics-writer", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        tmp_path = self.path + ".tmp"
+        with self._write_lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.registry.snapshot(), f)
+            os.replace(tmp_path, self.path)
+
+    def render_prometheus(self):
+        self.write()
+        snapshots = []
+        for filename in os.listdir(self.directory):
+            if not filename.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable metrics file %s", filename)
+        return render_snapshots(snapshots)
+
+
+class Trace:
+    """Stage timings collected for a single request"""
+
+    def __init__(self):
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def as_millis(self):
+        with self._lock:
+            return {stage: round(seconds * 1000, 3) for stage, seconds in self.timings.items()}
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace():
+    """Collect spans for one request; nested calls reuse the outer trace"""
+    trace = _current_trace.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(stage):
+    """Time a pipeline stage into the stage histogram and the current trace"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.histogram(
+            "schemasight_stage_duration_seconds", "Latency of each search pipeline stage", stage=stage
+        ).observe(elapsed)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.record(stage, elapsed)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = metrics.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics request: " + format, *args)
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port, host="127.0.0.1"):
+    """Serve /metrics on a background thread (once per process)"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        thread = threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True)
+        thread.start()
+        logger.info("Metrics endpoint listening on http://%s:%d/metrics", host, port)
+        return _server
@@ -0,0 +1,46 @@
+import threading
+import time
+from utils.deadline import DeadlineExceeded
+
+
+class RateLimiter:
+    """
+    Token bucket shared by threads calling a rate-limited dependency.
+
+    Tokens refill at ``rate`` per second up to ``burst``; each call takes one
+    token and waits for the next refill when the bucket is empty.
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token if one is available, otherwise return seconds until the next one"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, timeout=None):
+        """
+        Block until a token is available
+        :param timeout: seconds to wait before raising DeadlineExceeded
+        """
+        give_up_at = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return
+            if give_up_at is not None and time.monotonic() + wait > give_up_at:
+                raise DeadlineExceeded("Rate limit wait would exceed the deadline")
+            time.sleep(wait)
@@ -0,0 +1,71 @@
+import threading
+from utils.deadline import DeadlineExceeded
+from utils.metrics import metrics
+
+
+class _Call:
+    """One in-flight computation shared by every caller asking for the same key"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical requests.
+
+    The first caller for a key runs the function; callers arriving while it is
+    still running wait for it and receive the same result (or exception).
+    Nothing is cached once the call finishes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "executed": 0, "deduplicated": 0}
+
+    def do(self, key, func, *args, wait_timeout=None, **kwargs):
+        """
+        Run ``func(*args, **kwargs)`` once per concurrent ``key``
+        :param wait_timeout: how long a follower waits for the leader before
+            raising DeadlineExceeded (the leader itself is not interrupted)
+        """
+        with self._lock:
+            self._stats["calls"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["executed"] += 1
+            else:
+                self._stats["deduplicated"] += 1
+        if not leader:
+            metrics.counter(
+                "schemasight_coalesced_requests_total",
+                "Requests served by an identical in-flight call",
+                operation=self.name
+            ).inc()
+            if not call.done.wait(wait_timeout):
+                raise DeadlineExceeded(f"Timed out waiting for in-flight {self.name} call")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, in_flight=len(self._calls))
@@ -96,6 +96,34 @@ class SQLValidator:
         logger.info("SQL query validation passed")
         return True, None
 
+    def validate_partial(self, sql_prefix):
+        """
+        Early safety checks on a query that is still being generated
+        Only words that are already complete are checked, so a half-streamed
+        'updated_at' is not mistaken for UPDATE. Passing is no substitute for
+        validate_query on the finished SQL.
+        Returns:
+            tuple: (is_valid: bool, error_message: str or None)
+        """
+        normalized_query = re.sub(r'^\s*```(sql)?', '', sql_prefix.lower()).lstrip()
+        complete_part = re.sub(r'\w+$', '', normalized_query)
+
+        first_word = re.match(r'(\w+)\W', normalized_query)
+        if first_word and first_word.group(1) != 'select':
+            logger.warning("Streamed query does not start with SELECT")
+            return False, "Only SELECT queries are allowed"
+
+        for keyword in self.DANGEROUS_KEYWORDS:
+            if re.search(r'\b' + keyword + r'\b', complete_part):
+                logger.warning("Dangerous operation detected while streaming: %s", keyword.upper())
+                return False, f"Dangerous operation detected: {keyword.upper()}"
+
+        if re.search(r';\s*[^\s`]', complete_part):
+            logger.warning("Multiple statements detected while streaming")
+            return False, "Multiple statements not allowed"
+
+        return True, None
+
     def sanitize_input(self, user_input):
         """Sanitize user input to prevent injection"""
         if not user_input: